@@ -0,0 +1,90 @@
+"""Per-request auth overhead: token decoding plus the revocation check.
+
+Compares the original key-per-jti check (EXISTS, then GET, two round trips) with the
+pipelined HEXISTS/EXISTS/GET of is_revoked (one round trip), against the blacklist redis
+of the current ENVIRONMENT:
+
+    ENVIRONMENT=local uv run python -m benchmarks.auth_overhead -n 5000
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+import uuid
+from typing import Awaitable, Callable
+
+from src.core.cache import LocalCache
+from src.core.config import get_settings
+from src.core.database import redis_blacklist_init
+from src.users.auth.hashing import PasswordHasher
+from src.users.auth.schemas import TokenType, UserPayload
+from src.users.auth.services import SecurityService, TokenBlacklistService
+
+
+async def measure(func: Callable[[], Awaitable[object]], iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - start) * 1_000_000)
+    return timings
+
+
+def report(name: str, timings: list[float]) -> None:
+    percentiles = statistics.quantiles(timings, n=100)
+    print(
+        f"{name:<32} mean={statistics.fmean(timings):8.1f}us "
+        f"p50={percentiles[49]:8.1f}us p99={percentiles[98]:8.1f}us"
+    )
+
+
+async def main(iterations: int) -> None:
+    settings = get_settings()
+    redis_bl = redis_blacklist_init()
+    token_bl = TokenBlacklistService(redis_bl=redis_bl, settings=settings)
+    hasher = PasswordHasher(settings.PWD_CONTEXT, workers=1, queue_size=0)
+    token_cache = LocalCache(maxsize=settings.TOKEN_CACHE_MAX_ITEMS, ttl=60)
+    security = SecurityService(
+        token_bl=token_bl, settings=settings, hasher=hasher, token_cache=token_cache
+    )
+
+    user = UserPayload(id=1, username="benchmark", email="benchmark@example.com", is_admin=False)
+    jti = str(uuid.uuid4())
+    token = security.create_token(user, TokenType.access, jti)
+    payload = await security.decode_validate_token(token, TokenType.access)
+
+    async def sequential_check() -> None:
+        # the check as it was: a key per revoked jti and two dependent round trips
+        if not await redis_bl.exists(f"revoked:{payload.jti}"):
+            await redis_bl.get(f"logout_ts:{payload.sub}")
+
+    async def single_check() -> None:
+        await token_bl.is_revoked(payload.jti, payload.sub, payload.iat)
+
+    async def full_validation() -> None:
+        token_cache.invalidate()
+        await security.decode_validate_token(token, TokenType.access)
+
+    async def cached_validation() -> None:
+        await security.decode_validate_token(token, TokenType.access)
+
+    try:
+        # warm up the connection pool
+        await measure(single_check, 100)
+
+        report("revocation, 2 round trips", await measure(sequential_check, iterations))
+        report("revocation, 1 round trip", await measure(single_check, iterations))
+        report("decode_validate_token", await measure(full_validation, iterations))
+        report("decode_validate_token, cached", await measure(cached_validation, iterations))
+    finally:
+        await redis_bl.aclose()
+        hasher.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--iterations", type=int, default=5000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.iterations))
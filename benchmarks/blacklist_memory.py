@@ -0,0 +1,69 @@
+"""Memory used by the blacklist redis, per key family.
+
+Revoked jtis are grouped in one hash per user and logout-all timestamps are one key per
+user; both expire with the tokens they cover, so these numbers should follow the live
+sessions, not the history. Run it against the blacklist redis of the current ENVIRONMENT:
+
+    ENVIRONMENT=local uv run python -m benchmarks.blacklist_memory
+"""
+
+import argparse
+import asyncio
+from collections import defaultdict
+from itertools import batched
+
+from src.core.database import redis_blacklist_init
+
+
+async def main(batch_size: int) -> None:
+    redis_bl = redis_blacklist_init()
+    keys = defaultdict(int)
+    items = defaultdict(int)
+    memory = defaultdict(int)
+
+    try:
+        all_keys = [key async for key in redis_bl.scan_iter(count=batch_size)]
+        for batch in batched(all_keys, batch_size):
+            async with redis_bl.pipeline(transaction=False) as pipe:
+                for key in batch:
+                    pipe.type(key)
+                    pipe.memory_usage(key, samples=0)
+                results = await pipe.execute()
+
+            hashes = []
+            for key, key_type, usage in zip(batch, results[::2], results[1::2]):
+                family = key.partition(":")[0]
+                keys[family] += 1
+                memory[family] += usage or 0
+                if key_type == "hash":
+                    hashes.append(key)
+                else:
+                    items[family] += 1
+
+            if hashes:
+                async with redis_bl.pipeline(transaction=False) as pipe:
+                    for key in hashes:
+                        pipe.hlen(key)
+                    for key, length in zip(hashes, await pipe.execute()):
+                        items[key.partition(":")[0]] += length
+
+        print(f"{'family':<16} {'keys':>10} {'entries':>10} {'memory':>12} {'per entry':>10}")
+        for family in sorted(keys, key=memory.get, reverse=True):
+            per_entry = memory[family] / items[family] if items[family] else 0
+            print(
+                f"{family:<16} {keys[family]:10d} {items[family]:10d} "
+                f"{memory[family] / 1024:10.1f}KB {per_entry:9.1f}B"
+            )
+
+        info = await redis_bl.info("memory")
+        print(f"\nused_memory={info['used_memory_human']} dataset={info['used_memory_dataset']}B")
+    finally:
+        await redis_bl.aclose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    asyncio.run(main(args.batch_size))
@@ -0,0 +1,85 @@
+"""Password hash cost on this machine: latency and throughput per scheme and cost.
+
+Pick the strongest candidate whose verify latency still fits the login budget, then set
+PASSWORD_HASH_SCHEMES / BCRYPT_ROUNDS / ARGON2_* accordingly; existing hashes are upgraded
+on the next login of each user. argon2 candidates need argon2-cffi installed:
+
+    uv run python -m benchmarks.password_hashing -n 20 --threads 4
+"""
+
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from passlib.context import CryptContext
+from passlib.exc import MissingBackendError
+
+PASSWORD = "correct horse battery staple"
+
+CANDIDATES: dict[str, dict] = {
+    "bcrypt rounds=10": {"schemes": ["bcrypt"], "bcrypt__rounds": 10},
+    "bcrypt rounds=11": {"schemes": ["bcrypt"], "bcrypt__rounds": 11},
+    "bcrypt rounds=12": {"schemes": ["bcrypt"], "bcrypt__rounds": 12},
+    "bcrypt rounds=13": {"schemes": ["bcrypt"], "bcrypt__rounds": 13},
+    "argon2 t=2 m=19MiB p=1": {
+        "schemes": ["argon2"],
+        "argon2__time_cost": 2,
+        "argon2__memory_cost": 19456,
+        "argon2__parallelism": 1,
+    },
+    "argon2 t=3 m=64MiB p=4": {
+        "schemes": ["argon2"],
+        "argon2__time_cost": 3,
+        "argon2__memory_cost": 65536,
+        "argon2__parallelism": 4,
+    },
+}
+
+
+def measure_ms(func, iterations: int) -> list[float]:
+    timings = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def throughput(context: CryptContext, hashed: str, iterations: int, threads: int) -> float:
+    # bcrypt and argon2 release the GIL, so this is what a PasswordHasher pool can sustain
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        start = time.perf_counter()
+        list(executor.map(lambda _: context.verify(PASSWORD, hashed), range(iterations * threads)))
+        return iterations * threads / (time.perf_counter() - start)
+
+
+def main(iterations: int, threads: int) -> None:
+    print(
+        f"{'candidate':<24} {'hash p50':>10} {'verify p50':>11} {'verify max':>11} "
+        f"{'verify/s x' + str(threads):>14}"
+    )
+    for name, options in CANDIDATES.items():
+        context = CryptContext(**options)
+        try:
+            hashed = context.hash(PASSWORD)
+        except MissingBackendError:
+            print(f"{name:<24} skipped, backend is not installed")
+            continue
+
+        hash_timings = measure_ms(lambda: context.hash(PASSWORD), iterations)
+        verify_timings = measure_ms(lambda: context.verify(PASSWORD, hashed), iterations)
+        print(
+            f"{name:<24} {statistics.median(hash_timings):8.1f}ms "
+            f"{statistics.median(verify_timings):9.1f}ms {max(verify_timings):9.1f}ms "
+            f"{throughput(context, hashed, iterations, threads):14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("-n", "--iterations", type=int, default=20)
+    parser.add_argument("--threads", type=int, default=4)
+    args = parser.parse_args()
+
+    main(args.iterations, args.threads)
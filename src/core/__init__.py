@@ -1,14 +1,20 @@
 from src.core.database import Base
 from src.core.dependencies import (
     SessionDep,
+    ReadSessionDep,
+    ReplicaSetDep,
+    SessionMakerDep,
     AsyncClientDep,
     RedisCacheDep,
     RedisBlacklistDep,
+    LocalCacheDep,
     SettingsDep,
     AuthSettingsDep,
     BrokerClientDep,
+    PageParamsDep,
 )
 from src.core.log_config import logger
+from src.core.pagination import Page, PageParams, RenderedPage, etag_matches
 from src.core.service import SessionServiceBase, RedisServiceBase
 from src.core.config import get_settings
 
@@ -16,14 +22,23 @@ from src.core.config import get_settings
 __all__ = [
     Base,
     SessionDep,
+    ReadSessionDep,
+    ReplicaSetDep,
+    SessionMakerDep,
     AsyncClientDep,
     RedisCacheDep,
     RedisBlacklistDep,
+    LocalCacheDep,
     SettingsDep,
     AuthSettingsDep,
     BrokerClientDep,
+    PageParamsDep,
+    Page,
+    PageParams,
+    RenderedPage,
     SessionServiceBase,
     RedisServiceBase,
     get_settings,
+    etag_matches,
     logger,
 ]
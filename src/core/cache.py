@@ -0,0 +1,137 @@
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable
+
+from fastapi import FastAPI
+from redis.asyncio import Redis
+
+from src.core.config import Settings
+from src.core.log_config import logger
+
+CACHE_INVALIDATION_CHANNEL = "cache:invalidate"
+
+
+class LocalCache:
+    """In-process cache with a per-entry TTL and an LRU size bound.
+
+    generation grows with every invalidation. A caller that reads a value from elsewhere
+    passes the generation it saw before the read, so a value that was invalidated while
+    the read was in flight is not stored.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._items: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        item = self._items.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at < time.monotonic():
+            del self._items[key]
+            return None
+
+        self._items.move_to_end(key)
+        return value
+
+    def set(
+        self, key: str, value: Any, ttl: float | None = None, generation: int | None = None
+    ) -> None:
+        if generation is not None and generation != self.generation:
+            return
+        if ttl is None:
+            ttl = self.ttl
+
+        self._items[key] = (time.monotonic() + ttl, value)
+        self._items.move_to_end(key)
+        while len(self._items) > self.maxsize:
+            self._items.popitem(last=False)
+
+    def invalidate(self, prefix: str = "") -> None:
+        self.generation += 1
+        if not prefix:
+            self._items.clear()
+            return
+
+        for key in [key for key in self._items if key.startswith(prefix)]:
+            del self._items[key]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+
+def new_version() -> str:
+    # random tokens instead of counters: a flushed redis can never hand out an old version again
+    return uuid.uuid4().hex
+
+
+async def get_or_create_version(redis: Redis, key: str, ex: int | None = None) -> str:
+    version = new_version()
+    old_version = await redis.set(key, version, nx=True, get=True, ex=ex)
+    return old_version or version
+
+
+class SingleFlight:
+    """Coalesces concurrent background calls with the same key into one in-flight call."""
+
+    def __init__(self) -> None:
+        self._calls: dict[str, asyncio.Task] = {}
+
+    def spawn(self, key: str, func: Callable[[], Awaitable[Any]]) -> None:
+        """Starts the call in the background unless one with the same key is in flight."""
+        if key in self._calls:
+            return
+
+        # the dict holds the only strong reference to the task until it is done
+        task = asyncio.ensure_future(func())
+        self._calls[key] = task
+        task.add_done_callback(lambda _: self._calls.pop(key, None))
+        task.add_done_callback(_log_background_failure)
+
+
+def _log_background_failure(task: asyncio.Task) -> None:
+    if not task.cancelled() and (exc := task.exception()):
+        logger.warning("Background cache refresh failed: %r", exc)
+
+
+async def listen_invalidations(redis: Redis, local_cache: LocalCache) -> None:
+    while True:
+        try:
+            async with redis.pubsub() as pubsub:
+                await pubsub.subscribe(CACHE_INVALIDATION_CHANNEL)
+                # messages published while we were not subscribed are lost
+                local_cache.invalidate()
+
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        local_cache.invalidate(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.warning("Cache invalidation listener failed: %r", e)
+            local_cache.invalidate()
+            await asyncio.sleep(1)
+
+
+async def local_cache_startup(app: FastAPI, settings: Settings) -> None:
+    app.state.local_cache = LocalCache(
+        maxsize=settings.LOCAL_CACHE_MAX_ITEMS, ttl=settings.LOCAL_CACHE_SECONDS
+    )
+    app.state.local_cache_listener = asyncio.create_task(
+        listen_invalidations(app.state.redis_cache, app.state.local_cache)
+    )
+
+
+async def local_cache_shutdown(app: FastAPI) -> None:
+    app.state.local_cache_listener.cancel()
+    try:
+        await app.state.local_cache_listener
+    except asyncio.CancelledError:
+        pass
@@ -1,14 +1,17 @@
 from typing import Annotated, AsyncGenerator
 
-from fastapi import Depends, Request
+from fastapi import Depends, Query, Request
 from httpx import AsyncClient
 from redis.asyncio import Redis
-from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 from src.core.broker import BrokerClient
+from src.core.cache import LocalCache
 from src.core.log_config import logger
 from src.core.config import AuthSettings, Settings, get_auth_settings, get_settings
 from src.core.database import async_session_maker
+from src.core.replicas import ReplicaSet, is_pinned_to_primary
+from src.core.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, PageParams, decode_cursor
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
@@ -16,6 +19,11 @@ async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
         yield session
 
 
+async def get_session_maker() -> async_sessionmaker[AsyncSession]:
+    # for work that outlives the request, e.g. background cache refreshes
+    return async_session_maker
+
+
 async def get_async_client(request: Request) -> AsyncClient:
     client_session = request.app.state.async_client
     if client_session is None:
@@ -52,10 +60,54 @@ async def get_redis_blacklist(request: Request) -> Redis:
     return redis_blacklist
 
 
+async def get_local_cache(request: Request) -> LocalCache:
+    local_cache = request.app.state.local_cache
+    if local_cache is None:
+        message = "Local cache not initialized"
+        logger.error(message)
+        raise RuntimeError(message)
+    return local_cache
+
+
+async def get_replica_set(request: Request) -> ReplicaSet:
+    replicas = request.app.state.replicas
+    if replicas is None:
+        message = "Replica set not initialized"
+        logger.error(message)
+        raise RuntimeError(message)
+    return replicas
+
+
+async def get_read_session(
+    request: Request,
+    replicas: Annotated[ReplicaSet, Depends(get_replica_set)],
+    redis_cache: Annotated[Redis, Depends(get_redis_cache)],
+) -> AsyncGenerator[AsyncSession, None]:
+    # clients that just wrote, and everyone while no replica keeps up, read from the primary
+    session_maker = None
+    if replicas.engines and not await is_pinned_to_primary(redis_cache, request):
+        session_maker = replicas.pick()
+
+    async with (session_maker or async_session_maker)() as session:
+        yield session
+
+
+async def get_page_params(
+    limit: Annotated[int, Query(ge=1, le=MAX_PAGE_SIZE)] = DEFAULT_PAGE_SIZE,
+    after: Annotated[str | None, Query(description="Cursor returned in X-Next-Cursor")] = None,
+) -> PageParams:
+    return PageParams(limit=limit, after=decode_cursor(after) if after else None)
+
+
 SessionDep = Annotated[AsyncSession, Depends(get_async_session)]
+ReadSessionDep = Annotated[AsyncSession, Depends(get_read_session)]
+ReplicaSetDep = Annotated[ReplicaSet, Depends(get_replica_set)]
+SessionMakerDep = Annotated[async_sessionmaker[AsyncSession], Depends(get_session_maker)]
 AsyncClientDep = Annotated[AsyncClient, Depends(get_async_client)]
 BrokerClientDep = Annotated[BrokerClient, Depends(get_broker_client)]
 RedisCacheDep = Annotated[Redis, Depends(get_redis_cache)]
 RedisBlacklistDep = Annotated[Redis, Depends(get_redis_blacklist)]
+LocalCacheDep = Annotated[LocalCache, Depends(get_local_cache)]
 SettingsDep = Annotated[Settings, Depends(get_settings)]
 AuthSettingsDep = Annotated[AuthSettings, Depends(get_auth_settings)]
+PageParamsDep = Annotated[PageParams, Depends(get_page_params)]
@@ -0,0 +1,10 @@
+from fastapi import HTTPException, status
+
+
+class InvalidCursor(HTTPException):
+    def __init__(
+        self,
+        detail: str = "Invalid pagination cursor",
+        status_code: status = status.HTTP_400_BAD_REQUEST,
+    ):
+        super().__init__(detail=detail, status_code=status_code)
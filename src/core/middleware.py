@@ -1,7 +1,14 @@
+from typing import AsyncIterator
+
 from fastapi import Request, Response
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from src.core.config import Settings, get_settings
 from src.core.log_config import logger
+from src.core.query_stats import QueryStats, query_stats
+from src.core.replicas import pin_to_primary
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
 
 
 async def exception_middleware(request: Request, call_next):
@@ -11,3 +18,62 @@ async def exception_middleware(request: Request, call_next):
         logger.error("Request to %s failed: %r", request.url.path, e)
         response = JSONResponse(content={"detail": "Something went wrong"}, status_code=500)
     return response
+
+
+async def read_your_writes_middleware(request: Request, call_next):
+    response: Response = await call_next(request)
+    # only needed while reads can go to a replica
+    if request.method not in SAFE_METHODS and request.app.state.replicas.engines:
+        await pin_to_primary(
+            request.app.state.redis_cache, request, get_settings().DB_PRIMARY_PIN_SECONDS
+        )
+    return response
+
+
+async def query_stats_middleware(request: Request, call_next):
+    stats = QueryStats()
+    token = query_stats.set(stats)
+    try:
+        response: StreamingResponse = await call_next(request)
+    finally:
+        # the endpoint runs in a task that copied the context, it keeps counting into stats
+        query_stats.reset(token)
+
+    settings = get_settings()
+    if settings.QUERY_STATS_HEADER:
+        # headers go out before the body, queries run while streaming it are not included
+        response.headers["X-Query-Count"] = str(stats.count)
+        response.headers["X-Query-Time-Ms"] = f"{stats.seconds * 1000:.1f}"
+
+    body_iterator = response.body_iterator
+
+    async def report_after_body() -> AsyncIterator[bytes]:
+        try:
+            async for chunk in body_iterator:
+                yield chunk
+        finally:
+            _report_query_stats(request, stats, settings)
+
+    response.body_iterator = report_after_body()
+    return response
+
+
+def _report_query_stats(request: Request, stats: QueryStats, settings: Settings) -> None:
+    if stats.count > settings.QUERY_BUDGET:
+        logger.warning(
+            "Query budget exceeded: %s %s ran %s queries in %.1fms",
+            request.method,
+            request.url.path,
+            stats.count,
+            stats.seconds * 1000,
+        )
+
+    if (repeated := stats.most_repeated()) and repeated[1] >= settings.QUERY_REPEAT_LIMIT:
+        statement, repeats = repeated
+        logger.warning(
+            "Possible N+1: %s %s ran the same statement %s times: %s",
+            request.method,
+            request.url.path,
+            repeats,
+            " ".join(statement.split())[:300],
+        )
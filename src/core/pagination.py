@@ -0,0 +1,90 @@
+import base64
+import binascii
+import hashlib
+import json
+from dataclasses import dataclass
+
+from fastapi import Response
+from pydantic import BaseModel
+
+from src.core.exceptions import InvalidCursor
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+
+@dataclass
+class PageParams:
+    limit: int = DEFAULT_PAGE_SIZE
+    after: int | None = None  # id of the last item on the previous page
+
+
+class Page[T](BaseModel):
+    items: list[T]
+    next_cursor: str | None = None
+
+    @classmethod
+    def from_items(cls, items: list[T], limit: int) -> "Page[T]":
+        # items are fetched with limit + 1 rows, the extra one only tells that a next page exists
+        if len(items) > limit:
+            items = items[:limit]
+            return cls(items=items, next_cursor=encode_cursor(items[-1].id))
+        return cls(items=items)
+
+
+@dataclass
+class RenderedPage:
+    content: str  # final JSON array body, ready to be sent as is
+    next_cursor: str | None = None
+    stale: bool = False  # served from cache past its soft TTL, a refresh is due
+
+    @classmethod
+    def from_page(cls, page: Page) -> "RenderedPage":
+        items = [item.model_dump_json() for item in page.items]
+        return cls.from_json_items(items, page.next_cursor)
+
+    @classmethod
+    def from_json_items(cls, items: list[str], next_cursor: str | None = None) -> "RenderedPage":
+        return cls(content=f"[{','.join(items)}]", next_cursor=next_cursor)
+
+    def to_response(self, etag: str | None = None) -> Response:
+        headers = {}
+        if self.next_cursor:
+            headers["X-Next-Cursor"] = self.next_cursor
+        if etag:
+            headers["ETag"] = etag
+        return Response(content=self.content, media_type="application/json", headers=headers)
+
+
+def encode_cursor(item_id: int) -> str:
+    raw = json.dumps({"id": item_id}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        item_id = json.loads(raw)["id"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise InvalidCursor
+
+    if not isinstance(item_id, int) or isinstance(item_id, bool):
+        raise InvalidCursor
+    return item_id
+
+
+def page_etag(version: str, params: PageParams) -> str:
+    digest = hashlib.blake2b(
+        f"{version}:{params.after}:{params.limit}".encode(), digest_size=12
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses weak comparison, so W/ prefixes are ignored
+    tags = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag.removeprefix("W/") in tags
@@ -0,0 +1,55 @@
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+
+@dataclass
+class QueryStats:
+    """SQL statements run on behalf of one request.
+
+    Statements are counted by their text, which holds placeholders rather than values,
+    so a query issued once per row of a result shows up as one heavily repeated entry.
+    """
+
+    count: int = 0
+    seconds: float = 0.0
+    statements: Counter[str] = field(default_factory=Counter)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    def most_repeated(self) -> tuple[str, int] | None:
+        if not self.statements:
+            return None
+        return self.statements.most_common(1)[0]
+
+
+# set per request by the middleware; sqlalchemy runs the events in a greenlet that
+# inherits the request's context, so they record into the same object
+query_stats: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _end_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    start = conn.info["query_start"].pop()
+    if (stats := query_stats.get()) is not None:
+        stats.record(statement, time.perf_counter() - start)
+
+
+@event.listens_for(Engine, "handle_error")
+def _fail_query(exception_context) -> None:
+    if exception_context.connection is not None and (
+        starts := exception_context.connection.info.get("query_start")
+    ):
+        starts.pop()
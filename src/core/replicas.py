@@ -0,0 +1,127 @@
+import asyncio
+import hashlib
+import itertools
+
+from fastapi import FastAPI, Request
+from redis.asyncio import Redis
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from src.core.config import Settings
+from src.core.database import database_engine_init
+from src.core.log_config import logger
+
+PRIMARY_PIN_KEY_PREFIX = "db:primary"
+
+# zero while the replica has replayed everything it received, so an idle primary
+# does not make it look behind; NULL (unhealthy) while the WAL receiver is not streaming,
+# a disconnected replica has replayed all it received too. Reading the receiver status
+# needs pg_read_all_stats (pg_monitor) for the replica user
+REPLICA_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() THEN 0 "
+    "WHEN NOT EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE status = 'streaming') "
+    "THEN NULL "
+    "WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+class ReplicaSet:
+    """Read replicas with their last measured lag.
+
+    A replica gets reads only after its lag was measured and found within max_lag;
+    when none qualifies, reads go to the primary.
+    """
+
+    def __init__(self, engines: list[AsyncEngine], max_lag: float) -> None:
+        self.engines = engines
+        self.max_lag = max_lag
+        self.session_makers = [
+            async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+            for engine in engines
+        ]
+        self._lags: list[float | None] = [None] * len(engines)
+        self._turns = itertools.cycle(range(len(engines)))
+
+    def pick(self) -> async_sessionmaker[AsyncSession] | None:
+        for _ in range(len(self.engines)):
+            i = next(self._turns)
+            if self._is_healthy(i):
+                return self.session_makers[i]
+        return None
+
+    async def check_lag(self) -> None:
+        for i, engine in enumerate(self.engines):
+            try:
+                async with engine.connect() as conn:
+                    lag = (await conn.execute(REPLICA_LAG_QUERY)).scalar_one()
+                self._lags[i] = float(lag) if lag is not None else None
+            except Exception as e:
+                logger.warning("Replica lag check failed: host=%s, %r", engine.url.host, e)
+                self._lags[i] = None
+
+            if not self._is_healthy(i):
+                logger.warning("Replica skipped: host=%s, lag=%s", engine.url.host, self._lags[i])
+
+    def metrics(self) -> list[dict]:
+        return [
+            {
+                "host": engine.url.host,
+                "lag_seconds": self._lags[i],
+                "healthy": self._is_healthy(i),
+                **engine.sync_engine.pool.metrics(),
+            }
+            for i, engine in enumerate(self.engines)
+        ]
+
+    async def dispose(self) -> None:
+        for engine in self.engines:
+            await engine.dispose()
+
+    def _is_healthy(self, i: int) -> bool:
+        return self._lags[i] is not None and self._lags[i] <= self.max_lag
+
+
+def client_key(request: Request) -> str:
+    # the token identifies the client across workers, the address is the fallback
+    client = request.headers.get("Authorization") or (request.client and request.client.host)
+    return hashlib.blake2b(str(client).encode(), digest_size=16).hexdigest()
+
+
+async def pin_to_primary(redis: Redis, request: Request, seconds: int) -> None:
+    await redis.set(f"{PRIMARY_PIN_KEY_PREFIX}:{client_key(request)}", "1", ex=seconds)
+
+
+async def is_pinned_to_primary(redis: Redis, request: Request) -> bool:
+    return await redis.exists(f"{PRIMARY_PIN_KEY_PREFIX}:{client_key(request)}") == 1
+
+
+async def watch_replica_lag(replicas: ReplicaSet, check_seconds: float) -> None:
+    while True:
+        await replicas.check_lag()
+        await asyncio.sleep(check_seconds)
+
+
+async def replicas_startup(app: FastAPI, settings: Settings) -> None:
+    app.state.replicas = ReplicaSet(
+        engines=[database_engine_init(url) for url in settings.DB_REPLICA_URLS],
+        max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+    )
+    app.state.replica_watcher = None
+    if app.state.replicas.engines:
+        hosts = ", ".join(str(engine.url.host) for engine in app.state.replicas.engines)
+        logger.info("Read replicas: %s", hosts)
+        app.state.replica_watcher = asyncio.create_task(
+            watch_replica_lag(app.state.replicas, settings.DB_REPLICA_CHECK_SECONDS)
+        )
+
+
+async def replicas_shutdown(app: FastAPI) -> None:
+    if app.state.replica_watcher is not None:
+        app.state.replica_watcher.cancel()
+        try:
+            await app.state.replica_watcher
+        except asyncio.CancelledError:
+            pass
+
+    await app.state.replicas.dispose()
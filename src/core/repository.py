@@ -1,9 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import Sequence
+from typing import Any, AsyncIterator, Collection, Sequence
 
 from fastapi import HTTPException, status
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm.interfaces import LoaderOption
 
 from src.core.database import Base
 from src.core.log_config import logger
@@ -11,37 +12,64 @@ from src.core.log_config import logger
 
 class IRepository[T: Base](ABC):
     @abstractmethod
-    async def get_by_id(self, item_id: int) -> T | None: ...
+    async def get_by_id(self, item_id: int, options: Sequence[LoaderOption] = ()) -> T | None: ...
 
     @abstractmethod
-    async def get_by_id_or_404(self, item_id: int) -> T: ...
+    async def get_by_id_or_404(self, item_id: int, options: Sequence[LoaderOption] = ()) -> T: ...
 
     @abstractmethod
-    async def list(self) -> Sequence[T]: ...
+    async def get_by_ids(
+        self, item_ids: Collection[int], options: Sequence[LoaderOption] = ()
+    ) -> Sequence[T]: ...
+
+    @abstractmethod
+    async def list(
+        self,
+        limit: int | None = None,
+        after: int | None = None,
+        options: Sequence[LoaderOption] = (),
+    ) -> Sequence[T]: ...
+
+    @abstractmethod
+    def stream(
+        self, yield_per: int = 1000, options: Sequence[LoaderOption] = ()
+    ) -> AsyncIterator[T]: ...
 
     @abstractmethod
     async def add(self, item: T) -> T: ...
 
+    @abstractmethod
+    async def add_many(self, values: Sequence[dict[str, Any]]) -> Sequence[T]: ...
+
     @abstractmethod
     async def update(self, item: T) -> T: ...
 
     @abstractmethod
     async def delete(self, item: T) -> None: ...
 
+    @abstractmethod
+    async def delete_many(self, item_ids: Collection[int]) -> None: ...
+
 
 class ORMRepository[T: Base](IRepository[T]):
+    """Repository over one model.
+
+    Read methods take loader options, e.g. selectinload(Task.category), so callers that
+    need a relationship load it with the rows instead of lazily, one query per row.
+    """
+
     model: type[T]
 
     def __init__(self, session: AsyncSession) -> None:
         self.session = session
 
-    async def get_by_id(self, item_id: int) -> T | None:
-        stmt = select(self.model).where(self.model.id == item_id)
+    async def get_by_id(self, item_id: int, options: Sequence[LoaderOption] = ()) -> T | None:
+        stmt = select(self.model).where(self.model.id == item_id).options(*options)
         item = await self.session.scalar(stmt)
         return item
 
-    async def get_by_id_or_404(self, item_id: int) -> T:
-        item = await self.get_by_id(item_id)
+    async def get_by_id_or_404(self, item_id: int, options: Sequence[LoaderOption] = ()) -> T:
+        item = await self.get_by_id(item_id, options)
         if item is None:
             logger.warning("%s with id %s not found", self.model.__name__.lower(), item_id)
             raise HTTPException(
@@ -50,18 +78,59 @@ class ORMRepository[T: Base](IRepository[T]):
             )
         return item
 
-    async def list(self) -> Sequence[T]:
-        stmt = select(self.model)
+    async def get_by_ids(
+        self, item_ids: Collection[int], options: Sequence[LoaderOption] = ()
+    ) -> Sequence[T]:
+        stmt = select(self.model).where(self.model.id.in_(item_ids)).options(*options)
+        items = await self.session.scalars(stmt)
+        return items.all()
+
+    async def list(
+        self,
+        limit: int | None = None,
+        after: int | None = None,
+        options: Sequence[LoaderOption] = (),
+    ) -> Sequence[T]:
+        # keyset pagination on id: stable under concurrent inserts, no OFFSET scans
+        stmt = select(self.model).order_by(self.model.id).options(*options)
+        if after is not None:
+            stmt = stmt.where(self.model.id > after)
+        if limit is not None:
+            stmt = stmt.limit(limit)
         items = await self.session.scalars(stmt)
         return items.all()
 
+    async def stream(
+        self, yield_per: int = 1000, options: Sequence[LoaderOption] = ()
+    ) -> AsyncIterator[T]:
+        # server-side cursor: rows are fetched yield_per at a time instead of all at once
+        stmt = (
+            select(self.model)
+            .order_by(self.model.id)
+            .options(*options)
+            .execution_options(yield_per=yield_per)
+        )
+        items = await self.session.stream_scalars(stmt)
+        async for item in items:
+            yield item
+
     async def add(self, item: T) -> T:
         self.session.add(item)
         return item
 
+    async def add_many(self, values: Sequence[dict[str, Any]]) -> Sequence[T]:
+        # one executemany INSERT ... RETURNING, rows come back in the order of values
+        stmt = insert(self.model).returning(self.model, sort_by_parameter_order=True)
+        items = await self.session.scalars(stmt, values)
+        return items.all()
+
     async def update(self, item: T) -> T:
         self.session.add(item)
         return item
 
     async def delete(self, item: T) -> None:
         await self.session.delete(item)
+
+    async def delete_many(self, item_ids: Collection[int]) -> None:
+        stmt = delete(self.model).where(self.model.id.in_(item_ids))
+        await self.session.execute(stmt)
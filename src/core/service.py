@@ -1,17 +1,38 @@
+from collections.abc import Mapping
 from dataclasses import dataclass
 
 from redis.asyncio import Redis
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from src.core.config import Settings
 
+UNIQUE_VIOLATION = "23505"
+
 
 @dataclass
 class SessionServiceBase:
     session: AsyncSession
 
-    async def commit(self):
-        await self.session.commit()
+    async def commit(self, unique_errors: Mapping[str, type[Exception]] | None = None):
+        # unique_errors maps constraint names to the errors raised when the write breaks them;
+        # the constraint is the guard, so nothing is looked up before writing
+        try:
+            await self.session.commit()
+        except IntegrityError as e:
+            error = (unique_errors or {}).get(violated_unique_constraint(e))
+            if error is None:
+                raise
+            await self.session.rollback()
+            raise error from e
+
+
+def violated_unique_constraint(error: IntegrityError) -> str | None:
+    # the driver's own exception carries the constraint, sqlalchemy keeps it as the cause
+    driver_error = error.orig.__cause__ or error.orig
+    if getattr(driver_error, "sqlstate", None) != UNIQUE_VIOLATION:
+        return None
+    return getattr(driver_error, "constraint_name", None)
 
 
 @dataclass
@@ -4,6 +4,7 @@ from fastapi import FastAPI, APIRouter
 
 from src.core import get_settings, logger
 from src.core.broker import broker_startup, broker_shutdown
+from src.core.cache import local_cache_startup, local_cache_shutdown
 from src.core.database import (
     redis_startup,
     redis_shutdown,
@@ -11,11 +12,20 @@ from src.core.database import (
     async_client_shutdown,
 )
 from src.core.log_config import logger_startup
-from src.core.middleware import exception_middleware
+from src.core.middleware import (
+    exception_middleware,
+    query_stats_middleware,
+    read_your_writes_middleware,
+)
+from src.core.replicas import replicas_startup, replicas_shutdown
 from src.tasks.routers import task_router, category_router
+from src.users.auth.hashing import password_hasher_startup, password_hasher_shutdown
+from src.users.auth.revocation import revocation_index_startup, revocation_index_shutdown
 from src.users.auth.routers import auth_router
+from src.users.auth.token_cache import token_cache_startup
 from src.users.profile.router import router as profile_router
 from src.ping import router as ping_router
+from src.metrics import router as metrics_router
 
 
 @asynccontextmanager
@@ -26,19 +36,30 @@ async def lifespan(app: FastAPI):
     logger_startup(app=app)
     await async_client_startup(app=app)
     await redis_startup(app=app)
+    await replicas_startup(app=app, settings=settings)
+    await local_cache_startup(app=app, settings=settings)
+    await revocation_index_startup(app=app, settings=settings)
+    await password_hasher_startup(app=app, settings=settings)
+    await token_cache_startup(app=app, settings=settings)
 
     await app.state.broker_client.send_tg_message("Pomodoro-time app started")
     logger.info("App started!")
 
     yield
 
+    await password_hasher_shutdown(app=app)
+    await revocation_index_shutdown(app=app)
+    await local_cache_shutdown(app=app)
     await async_client_shutdown(app=app)
     await broker_shutdown(app=app)
+    await replicas_shutdown(app=app)
     await redis_shutdown(app=app)
 
 
 app = FastAPI(lifespan=lifespan)
 
+app.middleware("http")(read_your_writes_middleware)
+app.middleware("http")(query_stats_middleware)
 app.middleware("http")(exception_middleware)
 
 router = APIRouter(prefix="/api")
@@ -48,5 +69,6 @@ router.include_router(profile_router)
 router.include_router(task_router)
 router.include_router(category_router)
 router.include_router(ping_router)
+router.include_router(metrics_router)
 
 app.include_router(router)
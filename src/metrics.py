@@ -0,0 +1,32 @@
+from fastapi import APIRouter
+
+from src.core import ReplicaSetDep, logger
+from src.core.database import engine
+from src.users.auth.exceptions import AccessDenied
+from src.users.auth.schemas import UserPayload
+from src.users.dependencies import CurrentUserDep, PasswordHasherDep
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+
+@router.get("/password-hashing")
+async def password_hashing_metrics(hasher: PasswordHasherDep, current_user: CurrentUserDep) -> dict:
+    _check_admin(current_user)
+    return {"component": "password hashing", **hasher.metrics()}
+
+
+@router.get("/database")
+async def database_metrics(replicas: ReplicaSetDep, current_user: CurrentUserDep) -> dict:
+    _check_admin(current_user)
+    return {
+        "component": "database",
+        **engine.sync_engine.pool.metrics(),
+        "replicas": replicas.metrics(),
+    }
+
+
+def _check_admin(current_user: UserPayload) -> None:
+    # queue depth and pool saturation tell an attacker when the service is under strain
+    if not current_user.is_admin:
+        logger.info("Metrics access denied: user %s is not admin", current_user.username)
+        raise AccessDenied
@@ -1,8 +1,15 @@
-from typing import Annotated
+from typing import Annotated, Any, Awaitable, Callable
 
 from fastapi import Depends
 
-from src.core import RedisCacheDep, SessionDep, SettingsDep
+from src.core import (
+    LocalCacheDep,
+    ReadSessionDep,
+    RedisCacheDep,
+    SessionDep,
+    SessionMakerDep,
+    SettingsDep,
+)
 from src.tasks.repository import CategoryRepository, TaskRepository
 from src.tasks.services import CategoryService, TaskService, TaskCacheService, CategoryCacheService
 
@@ -17,32 +24,58 @@ TaskCacheDep = Annotated[TaskCacheService, Depends(get_tasks_cache_service)]
 
 
 async def get_cat_cache_service(
-    redis_cache: RedisCacheDep, settings: SettingsDep
+    redis_cache: RedisCacheDep, local_cache: LocalCacheDep, settings: SettingsDep
 ) -> CategoryCacheService:
-    return CategoryCacheService(redis=redis_cache, settings=settings)
+    return CategoryCacheService(redis=redis_cache, settings=settings, local_cache=local_cache)
 
 
 CatCacheDep = Annotated[CategoryCacheService, Depends(get_cat_cache_service)]
 
 
-async def get_category_service(session: SessionDep, cat_cache: CatCacheDep) -> CategoryService:
-    return CategoryService(
-        session=session,
-        cat_repo=CategoryRepository(session=session),
-        cat_cache=cat_cache,
-    )
-
-
-CategoryServiceDep = Annotated[CategoryService, Depends(get_category_service)]
-
-
-async def get_tasks_service(session: SessionDep, task_cache: TaskCacheDep) -> TaskService:
-    return TaskService(
-        session=session,
-        task_repo=TaskRepository(session=session),
-        cat_repo=CategoryRepository(session=session),
-        task_cache=task_cache,
-    )
-
-
-TaskServiceDep = Annotated[TaskService, Depends(get_tasks_service)]
+# the read services take the replica session for uncached reads only: whatever fills a shared
+# cache reads from the primary, so a lagging replica can never put stale rows in front of everyone
+def category_service_factory(session_dep: Any) -> Callable[..., Awaitable[CategoryService]]:
+    async def get_category_service(
+        session: session_dep,
+        session_maker: SessionMakerDep,
+        cat_cache: CatCacheDep,
+        task_cache: TaskCacheDep,
+    ) -> CategoryService:
+        return CategoryService(
+            session=session,
+            cat_repo=CategoryRepository(session=session),
+            cat_cache=cat_cache,
+            task_cache=task_cache,
+            session_maker=session_maker,
+        )
+
+    return get_category_service
+
+
+CategoryServiceDep = Annotated[CategoryService, Depends(category_service_factory(SessionDep))]
+CategoryReadServiceDep = Annotated[
+    CategoryService, Depends(category_service_factory(ReadSessionDep))
+]
+
+
+def tasks_service_factory(session_dep: Any) -> Callable[..., Awaitable[TaskService]]:
+    async def get_tasks_service(
+        session: session_dep,
+        session_maker: SessionMakerDep,
+        task_cache: TaskCacheDep,
+        settings: SettingsDep,
+    ) -> TaskService:
+        return TaskService(
+            session=session,
+            task_repo=TaskRepository(session=session),
+            cat_repo=CategoryRepository(session=session),
+            task_cache=task_cache,
+            settings=settings,
+            session_maker=session_maker,
+        )
+
+    return get_tasks_service
+
+
+TaskServiceDep = Annotated[TaskService, Depends(tasks_service_factory(SessionDep))]
+TaskReadServiceDep = Annotated[TaskService, Depends(tasks_service_factory(ReadSessionDep))]
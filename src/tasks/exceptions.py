@@ -6,6 +6,20 @@ class TaskNotFound(HTTPException):
         super().__init__(detail=detail, status_code=status.HTTP_404_NOT_FOUND)
 
 
+class CategoryNotFound(HTTPException):
+    def __init__(self, detail: str = "There is no category with requested id"):
+        super().__init__(detail=detail, status_code=status.HTTP_404_NOT_FOUND)
+
+
+class DuplicateBulkItem(HTTPException):
+    def __init__(
+        self,
+        detail: str = "Item is repeated in this request",
+        status_code: status = status.HTTP_409_CONFLICT,
+    ):
+        super().__init__(detail=detail, status_code=status_code)
+
+
 class TaskNameAlreadyExists(HTTPException):
     def __init__(
         self,
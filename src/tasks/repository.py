@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
-from typing import Sequence
+from typing import Any, Collection, Sequence
 
 from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm.interfaces import LoaderOption
 
 from src.core.repository import IRepository, ORMRepository
 from src.tasks.models import Category, Task
@@ -12,7 +14,17 @@ class ITaskRepository(IRepository[Task], ABC):
     async def get_by_name(self, name: str) -> Task | None: ...
 
     @abstractmethod
-    async def get_by_category_id(self, category_id: int) -> Sequence[Task]: ...
+    async def get_by_names(self, names: Collection[str]) -> Sequence[Task]: ...
+
+    @abstractmethod
+    async def add_many_skip_taken_names(
+        self, values: Sequence[dict[str, Any]]
+    ) -> Sequence[Task]: ...
+
+    @abstractmethod
+    async def get_by_category_id(
+        self, category_id: int, options: Sequence[LoaderOption] = ()
+    ) -> Sequence[Task]: ...
 
 
 class ICategoryRepository(IRepository[Category], ABC):
@@ -28,8 +40,21 @@ class TaskRepository(ORMRepository[Task], ITaskRepository):
         task = await self.session.scalar(stmt)
         return task
 
-    async def get_by_category_id(self, category_id: int) -> Sequence[Task]:
-        stmt = select(Task).where(Task.category_id == category_id)
+    async def get_by_names(self, names: Collection[str]) -> Sequence[Task]:
+        stmt = select(Task).where(Task.name.in_(names))
+        tasks = await self.session.scalars(stmt)
+        return tasks.all()
+
+    async def add_many_skip_taken_names(self, values: Sequence[dict[str, Any]]) -> Sequence[Task]:
+        # rows whose name already exists are not inserted and not returned, in no set order
+        stmt = insert(Task).on_conflict_do_nothing(index_elements=[Task.name]).returning(Task)
+        tasks = await self.session.scalars(stmt, values)
+        return tasks.all()
+
+    async def get_by_category_id(
+        self, category_id: int, options: Sequence[LoaderOption] = ()
+    ) -> Sequence[Task]:
+        stmt = select(Task).where(Task.category_id == category_id).options(*options)
         tasks = await self.session.scalars(stmt)
         return tasks.all()
 
@@ -1,7 +1,10 @@
-from fastapi import APIRouter
+from typing import Annotated
+
+from fastapi import APIRouter, Header, Response
 from starlette import status
 
-from src.tasks.dependencies import CategoryServiceDep
+from src.core import PageParamsDep, etag_matches
+from src.tasks.dependencies import CategoryReadServiceDep, CategoryServiceDep
 from src.tasks.schemas import CategoryCreate, CategoryDb
 from src.tasks.schemas.categories import CategoryDeleteResponse
 from src.users.dependencies import CurrentUserDep
@@ -10,8 +13,19 @@ router = APIRouter(prefix="/categories", tags=["categories"])
 
 
 @router.get("/", response_model=list[CategoryDb])
-async def get_all_categories(service: CategoryServiceDep) -> list[CategoryDb]:
-    return await service.get_all()
+async def get_all_categories(
+    service: CategoryServiceDep,
+    page_params: PageParamsDep,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    # the version is read before the body, so a 304 is never sent for data the client has not seen
+    etag = await service.get_etag(page_params)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    # the body comes pre-rendered from the cache, so it bypasses response_model serialization
+    page = await service.get_all(page_params)
+    return page.to_response(etag=etag)
 
 
 @router.post("/", response_model=CategoryDb, status_code=status.HTTP_201_CREATED)
@@ -22,7 +36,7 @@ async def create_category(
 
 
 @router.get("/{cat_id}", response_model=CategoryDb)
-async def get_one_category(cat_id: int, service: CategoryServiceDep) -> CategoryDb:
+async def get_one_category(cat_id: int, service: CategoryReadServiceDep) -> CategoryDb:
     return await service.get_by_id(cat_id)
 
 
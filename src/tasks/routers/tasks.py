@@ -1,15 +1,48 @@
-from fastapi import APIRouter, status
+from typing import Annotated
 
-from src.tasks.dependencies import TaskServiceDep
-from src.tasks.schemas import TaskCreate, TaskDb, TaskDeleteResponse
+from fastapi import APIRouter, Header, Response, status
+from fastapi.responses import StreamingResponse
+
+from src.core import PageParamsDep, etag_matches
+from src.tasks.dependencies import TaskReadServiceDep, TaskServiceDep
+from src.tasks.schemas import (
+    TaskBulkCreate,
+    TaskBulkDelete,
+    TaskBulkResult,
+    TaskBulkUpdate,
+    TaskCreate,
+    TaskDb,
+    TaskDeleteResponse,
+    TaskExpand,
+    TaskWithCategory,
+)
 from src.users.dependencies import CurrentUserDep
 
 router = APIRouter(prefix="/tasks", tags=["tasks"])
 
 
-@router.get("/", response_model=list[TaskDb])
-async def get_all_tasks(service: TaskServiceDep) -> list[TaskDb]:
-    return await service.get_all()
+@router.get("/", response_model=list[TaskWithCategory] | list[TaskDb])
+async def get_all_tasks(
+    service: TaskServiceDep,
+    read_service: TaskReadServiceDep,
+    page_params: PageParamsDep,
+    expand: TaskExpand | None = None,
+    if_none_match: Annotated[str | None, Header()] = None,
+) -> Response:
+    if expand is not None:
+        # embedded categories are versioned apart from the tasks, so there is no etag;
+        # nor a cache, so the page is read from a replica
+        page = await read_service.get_all(page_params, expand)
+        return page.to_response()
+
+    # the version is read before the body, so a 304 is never sent for data the client has not seen
+    etag = await service.get_etag(page_params)
+    if etag_matches(if_none_match, etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+    # the body comes pre-rendered from the cache, so it bypasses response_model serialization
+    page = await service.get_all(page_params)
+    return page.to_response(etag=etag)
 
 
 @router.post("/", response_model=TaskDb, status_code=status.HTTP_201_CREATED)
@@ -19,9 +52,37 @@ async def create_task(
     return await service.create(body, current_user)
 
 
-@router.get("/{task_id}", response_model=TaskDb)
-async def get_one_task(task_id: int, service: TaskServiceDep) -> TaskDb:
-    return await service.get_by_id(task_id)
+@router.get("/export", response_class=StreamingResponse)
+async def export_tasks(service: TaskReadServiceDep) -> StreamingResponse:
+    return StreamingResponse(service.export(), media_type="application/x-ndjson")
+
+
+@router.post("/bulk", response_model=list[TaskBulkResult])
+async def bulk_create_tasks(
+    body: TaskBulkCreate, service: TaskServiceDep, current_user: CurrentUserDep
+) -> list[TaskBulkResult]:
+    return await service.bulk_create(body.tasks, current_user)
+
+
+@router.patch("/bulk", response_model=list[TaskBulkResult])
+async def bulk_update_tasks(
+    body: TaskBulkUpdate, service: TaskServiceDep, current_user: CurrentUserDep
+) -> list[TaskBulkResult]:
+    return await service.bulk_update(body.tasks, current_user)
+
+
+@router.delete("/bulk", response_model=list[TaskBulkResult])
+async def bulk_delete_tasks(
+    body: TaskBulkDelete, service: TaskServiceDep, current_user: CurrentUserDep
+) -> list[TaskBulkResult]:
+    return await service.bulk_delete(body.ids, current_user)
+
+
+@router.get("/{task_id}", response_model=TaskWithCategory | TaskDb)
+async def get_one_task(
+    task_id: int, service: TaskReadServiceDep, expand: TaskExpand | None = None
+) -> TaskDb | TaskWithCategory:
+    return await service.get_by_id(task_id, expand)
 
 
 @router.put("/{task_id}", response_model=TaskDb)
@@ -39,6 +100,17 @@ async def delete_task(
     return TaskDeleteResponse()
 
 
-@router.get("/category/{cat_id}", response_model=list[TaskDb])
-async def get_tasks_by_category(cat_id: int, service: TaskServiceDep) -> list[TaskDb]:
-    return await service.get_tasks_by_category(cat_id)
+@router.get("/category/{cat_id}", response_model=list[TaskWithCategory] | list[TaskDb])
+async def get_tasks_by_category(
+    cat_id: int,
+    service: TaskServiceDep,
+    read_service: TaskReadServiceDep,
+    expand: TaskExpand | None = None,
+) -> Response:
+    if expand is not None:
+        # uncached like the expanded list, so it is read from a replica as well
+        page = await read_service.get_tasks_by_category(cat_id, expand)
+        return page.to_response()
+
+    page = await service.get_tasks_by_category(cat_id, expand)
+    return page.to_response()
@@ -1,5 +1,29 @@
 from src.tasks.schemas.categories import CategoryCreate, CategoryDb
-from src.tasks.schemas.tasks import TaskCreate, TaskDb, TaskDeleteResponse
+from src.tasks.schemas.tasks import (
+    TaskBulkCreate,
+    TaskBulkDelete,
+    TaskBulkResult,
+    TaskBulkUpdate,
+    TaskCreate,
+    TaskDb,
+    TaskDeleteResponse,
+    TaskExpand,
+    TaskPatch,
+    TaskWithCategory,
+)
 
 
-__all__ = [CategoryCreate, CategoryDb, TaskCreate, TaskDb, TaskDeleteResponse]
+__all__ = [
+    CategoryCreate,
+    CategoryDb,
+    TaskBulkCreate,
+    TaskBulkDelete,
+    TaskBulkResult,
+    TaskBulkUpdate,
+    TaskCreate,
+    TaskDb,
+    TaskDeleteResponse,
+    TaskExpand,
+    TaskPatch,
+    TaskWithCategory,
+]
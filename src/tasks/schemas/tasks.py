@@ -1,4 +1,12 @@
-from pydantic import BaseModel, ConfigDict
+from enum import Enum
+from typing import Any
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ConfigDict, Field
+
+from src.tasks.schemas.categories import CategoryDb
+
+MAX_BULK_SIZE = 1000
 
 
 class TaskBase(BaseModel):
@@ -14,9 +22,56 @@ class TaskDb(TaskBase):
     model_config = ConfigDict(from_attributes=True)
 
 
+class TaskExpand(str, Enum):
+    category = "category"
+
+
+class TaskWithCategory(TaskDb):
+    category: CategoryDb | None
+
+
 class TaskCreate(TaskBase):
     pass
 
 
 class TaskDeleteResponse(BaseModel):
     detail: str = "Task successfully deleted"
+
+
+class TaskPatch(BaseModel):
+    id: int
+    name: str | None = None
+    pomodoro_count: int | None = None
+    category_id: int | None = None
+
+    def get_changes(self) -> dict[str, Any]:
+        # only category_id can be cleared with an explicit null
+        changes = self.model_dump(exclude_unset=True, exclude={"id"})
+        return {
+            key: value
+            for key, value in changes.items()
+            if value is not None or key == "category_id"
+        }
+
+
+class TaskBulkCreate(BaseModel):
+    tasks: list[TaskCreate] = Field(min_length=1, max_length=MAX_BULK_SIZE)
+
+
+class TaskBulkUpdate(BaseModel):
+    tasks: list[TaskPatch] = Field(min_length=1, max_length=MAX_BULK_SIZE)
+
+
+class TaskBulkDelete(BaseModel):
+    ids: list[int] = Field(min_length=1, max_length=MAX_BULK_SIZE)
+
+
+class TaskBulkResult(BaseModel):
+    status_code: int
+    id: int | None = None
+    detail: str | None = None
+    task: TaskDb | None = None
+
+    @classmethod
+    def from_error(cls, exc: HTTPException, item_id: int | None = None) -> "TaskBulkResult":
+        return cls(status_code=exc.status_code, id=item_id, detail=exc.detail)
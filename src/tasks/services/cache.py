@@ -1,49 +1,352 @@
-import json
+import asyncio
+import time
+import uuid
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterable, AsyncIterator, Iterable
 
+from redis.exceptions import LockError, WatchError
 
-from src.core import RedisServiceBase
-from src.tasks.schemas import TaskDb, CategoryDb
+from src.core import PageParams, RedisServiceBase, RenderedPage, logger
+from src.core.cache import (
+    CACHE_INVALIDATION_CHANNEL,
+    LocalCache,
+    get_or_create_version,
+    new_version,
+)
+from src.core.pagination import encode_cursor
+from src.tasks.schemas import TaskDb
+
+# returns false when the index is cold or an indexed task has no cached JSON, otherwise
+# up to ARGV[2] ids with id > ARGV[1] together with their cached JSON and the seconds left
+# until the index expires
+GET_PAGE_SCRIPT = """
+local ttl = redis.call('TTL', KEYS[1])
+if ttl == -2 then
+    return false
+end
+local ids = redis.call('ZRANGEBYSCORE', KEYS[2], ARGV[1], '+inf', 'LIMIT', 0, ARGV[2])
+if #ids == 0 then
+    return {{}, {}, ttl}
+end
+local items = redis.call('HMGET', KEYS[3], unpack(ids))
+for i = 1, #items do
+    if not items[i] then
+        return false
+    end
+end
+return {ids, items, ttl}
+"""
+
+# returns 0 when the index is cold; otherwise stores the ARGV[2..] id/JSON pairs, unless the
+# version moved away from ARGV[1], the version the caller read before loading the tasks
+FILL_ITEMS_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return 0
+end
+if #ARGV > 1 and redis.call('GET', KEYS[2]) == ARGV[1] then
+    redis.call('HSET', KEYS[3], unpack(ARGV, 2))
+end
+return 1
+"""
+
+# stores the page only while the version is still ARGV[1], the version it was loaded at;
+# a loader that read the db before a write can not put its page back after the invalidation
+SET_PAGE_SCRIPT = """
+if redis.call('GET', KEYS[2]) ~= ARGV[1] then
+    return 0
+end
+redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+redis.call('HEXPIRE', KEYS[1], ARGV[4], 'FIELDS', 1, ARGV[2])
+return 1
+"""
 
 
 class TaskCacheService(RedisServiceBase):
-    async def get_all_tasks(self, key: str = "tasks:all") -> list[TaskDb] | None:
-        if tasks_json := await self.redis.get(key):
-            tasks = [TaskDb.model_validate(task) for task in json.loads(tasks_json)]
-            return tasks
+    # tasks are cached one entry per id in a hash, ordered by a sorted set index;
+    # the ready marker says the index is complete, the version token changes on every write.
+    # Writes update the index but drop the entries of the written tasks, a read that finds a
+    # missing entry loads the page from the db and fills it back.
+    # The index lives DEFAULT_CACHE_SECONDS + CACHE_STALE_SECONDS, during the last
+    # CACHE_STALE_SECONDS pages are marked stale so the caller can refresh in the background
+    items_key: str = "tasks:items"
+    index_key: str = "tasks:index"
+    ready_key: str = "tasks:ready"
+    version_key: str = "tasks:version"
+    lock_key: str = "tasks:lock"
+    category_key_prefix: str = "tasks:category"
+
+    async def get_page(self, params: PageParams) -> RenderedPage | None:
+        # cached entries are already the JSON of TaskDb, so a hit is joined into the body as is
+        get_page = self.redis.register_script(GET_PAGE_SCRIPT)
+        min_score = f"({params.after}" if params.after is not None else "-inf"
+        result = await get_page(
+            keys=[self.ready_key, self.index_key, self.items_key],
+            args=[min_score, params.limit + 1],
+        )
+        if result is None:
+            return None
+
+        task_ids, tasks_json, ttl = result
+        next_cursor = None
+        if len(task_ids) > params.limit:
+            tasks_json = tasks_json[: params.limit]
+            next_cursor = encode_cursor(int(task_ids[params.limit - 1]))
+
+        page = RenderedPage.from_json_items(tasks_json, next_cursor)
+        page.stale = 0 <= ttl <= self.settings.CACHE_STALE_SECONDS
+        return page
+
+    async def fill_tasks(self, tasks: list[TaskDb], version: str) -> bool:
+        # False means the index is cold and has to be rebuilt
+        fill_items = self.redis.register_script(FILL_ITEMS_SCRIPT)
+        items = [value for task in tasks for value in (str(task.id), task.model_dump_json())]
+        result = await fill_items(
+            keys=[self.ready_key, self.version_key, self.items_key], args=[version, *items]
+        )
+        return bool(result)
+
+    async def rebuild(
+        self, chunks: AsyncIterable[list[TaskDb]], version: str, ex: int | None = None
+    ) -> bool:
+        if ex is None:
+            ex = self.settings.DEFAULT_CACHE_SECONDS
+        ex += self.settings.CACHE_STALE_SECONDS
+
+        # chunks are staged under temporary keys and swapped in at once,
+        # so the loader never has to hold the whole table in memory
+        build_id = uuid.uuid4().hex
+        items_build_key = f"{self.items_key}:build:{build_id}"
+        index_build_key = f"{self.index_key}:build:{build_id}"
+        loaded = 0
+
+        try:
+            async for tasks in chunks:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    pipe.hset(
+                        items_build_key,
+                        mapping={str(task.id): task.model_dump_json() for task in tasks},
+                    )
+                    pipe.zadd(index_build_key, {str(task.id): task.id for task in tasks})
+                    pipe.expire(items_build_key, ex)
+                    pipe.expire(index_build_key, ex)
+                    await pipe.execute()
+                loaded += len(tasks)
+
+            async with self.redis.pipeline(transaction=True) as pipe:
+                # swap only if no write has been applied since the loader read the version
+                await pipe.watch(self.version_key)
+                if await pipe.get(self.version_key) != version:
+                    logger.debug("Task cache rebuild skipped: version changed")
+                    return False
+
+                pipe.multi()
+                pipe.delete(self.items_key, self.index_key)
+                if loaded:
+                    pipe.rename(items_build_key, self.items_key)
+                    pipe.rename(index_build_key, self.index_key)
+                pipe.set(self.ready_key, "1", ex=ex)
+                await pipe.execute()
+
+            logger.debug("Task cache rebuilt: tasks=%s", loaded)
+            return True
+        except WatchError:
+            logger.debug("Task cache rebuild skipped: version changed")
+            return False
+        finally:
+            await self.redis.delete(items_build_key, index_build_key)
+
+    @asynccontextmanager
+    async def rebuild_lock(self) -> AsyncIterator[bool]:
+        # short cross-worker lock, it only has to keep other workers from rebuilding in parallel
+        lock = self.redis.lock(
+            self.lock_key, timeout=self.settings.CACHE_LOCK_SECONDS, blocking=False
+        )
+        acquired = await lock.acquire()
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    await lock.release()
+                except LockError:
+                    logger.warning("Task cache lock expired before the rebuild finished")
+
+    async def wait_ready(self, timeout: float | None = None, interval: float = 0.05) -> bool:
+        if timeout is None:
+            timeout = self.settings.CACHE_LOCK_WAIT_SECONDS
+
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if await self.redis.exists(self.ready_key):
+                return True
+            await asyncio.sleep(interval)
+        return False
+
+    async def get_version(self) -> str:
+        return await get_or_create_version(self.redis, self.version_key)
+
+    async def get_category_tasks(self, cat_id: int) -> RenderedPage | None:
+        if content := await self.redis.get(self._category_key(cat_id)):
+            return RenderedPage(content=content)
         return None
 
-    async def set_all_tasks(
-        self, tasks: list[TaskDb], key: str = "tasks:all", ex: int | None = None
+    async def set_category_tasks(
+        self, cat_id: int, page: RenderedPage, version: str, ex: int | None = None
     ) -> None:
         if ex is None:
             ex = self.settings.DEFAULT_CACHE_SECONDS
 
-        tasks_json = json.dumps([task.model_dump() for task in tasks], ensure_ascii=False)
-        await self.redis.set(key, tasks_json, ex=ex)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            try:
+                # same guard as the full rebuild: a write after the loader read the version wins
+                await pipe.watch(self.version_key)
+                if await pipe.get(self.version_key) != version:
+                    return
 
-    async def delete_all_tasks(self, key: str = "tasks:all") -> None:
-        await self.redis.delete(key)
+                pipe.multi()
+                pipe.set(self._category_key(cat_id), page.content, ex=ex)
+                await pipe.execute()
+            except WatchError:
+                logger.debug("Category tasks cache skipped: version changed")
 
+    async def delete_category_tasks(self, cat_id: int) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self._category_key(cat_id))
+            # a loader that read the category before the delete must not cache it afterwards
+            pipe.set(self.version_key, new_version())
+            await pipe.execute()
 
+    async def set_task(self, task: TaskDb, old_category_id: int | None = None) -> None:
+        await self.set_tasks([task], [old_category_id])
+
+    async def set_tasks(
+        self, tasks: list[TaskDb], old_category_ids: Iterable[int | None] = ()
+    ) -> None:
+        if not tasks:
+            return
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            # the entries are dropped rather than rewritten: concurrent writes can reach redis
+            # in another order than they committed, a fill is guarded by the version instead
+            pipe.hdel(self.items_key, *(str(task.id) for task in tasks))
+            pipe.zadd(self.index_key, {str(task.id): task.id for task in tasks})
+            pipe.set(self.version_key, new_version())
+            # the tasks entered, left or changed inside these categories
+            category_ids = [task.category_id for task in tasks] + list(old_category_ids)
+            if category_keys := self._category_keys(*category_ids):
+                pipe.delete(*category_keys)
+            await pipe.execute()
+
+    async def delete_task(self, task_id: int, category_id: int | None = None) -> None:
+        await self.delete_tasks([task_id], [category_id])
+
+    async def delete_tasks(
+        self, task_ids: list[int], category_ids: Iterable[int | None] = ()
+    ) -> None:
+        if not task_ids:
+            return
+
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hdel(self.items_key, *map(str, task_ids))
+            pipe.zrem(self.index_key, *map(str, task_ids))
+            pipe.set(self.version_key, new_version())
+            if category_keys := self._category_keys(*category_ids):
+                pipe.delete(*category_keys)
+            await pipe.execute()
+
+    def _category_key(self, cat_id: int) -> str:
+        return f"{self.category_key_prefix}:{cat_id}"
+
+    def _category_keys(self, *cat_ids: int | None) -> list[str]:
+        return [self._category_key(cat_id) for cat_id in set(cat_ids) if cat_id is not None]
+
+
+@dataclass
 class CategoryCacheService(RedisServiceBase):
-    async def get_all_categories(self, key: str = "categories:all") -> list[CategoryDb] | None:
-        if categories_json := await self.redis.get(key):
-            categories = [
-                CategoryDb.model_validate(category) for category in json.loads(categories_json)
-            ]
-            return categories
-        return None
+    # pages live in-process first (L1) and in redis second (L2); every cached page is a field
+    # of one hash, so a write drops all L2 pages with a single DEL and all L1 pages via pub/sub.
+    # Each field expires on its own after DEFAULT_CACHE_SECONDS + CACHE_STALE_SECONDS and is
+    # served as stale during the last CACHE_STALE_SECONDS; stale pages are never put in L1.
+    # A page is stored with the version it was loaded at and only served at that version
+    local_cache: LocalCache
+    pages_key: str = "categories:pages"
+    version_key: str = "categories:pages:version"
+
+    async def get_page(self, params: PageParams, version: str) -> RenderedPage | None:
+        field = self._page_field(params)
+        if cached := self.local_cache.get(f"{self.pages_key}:{field}"):
+            page_version, page = cached
+            return page if page_version == version else None
+
+        generation = self.local_cache.generation
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.hget(self.pages_key, field)
+            pipe.httl(self.pages_key, field)
+            page_raw, (ttl,) = await pipe.execute()
 
-    async def set_all_categories(
-        self, categories: list[CategoryDb], key: str = "categories:all", ex: int | None = None
+        if page_raw is None:
+            return None
+
+        # the stored value is the version, the next cursor and the response body, one per line
+        page_version, _, page_raw = page_raw.partition("\n")
+        next_cursor, _, content = page_raw.partition("\n")
+        if page_version != version:
+            return None
+
+        page = RenderedPage(
+            content=content,
+            next_cursor=next_cursor or None,
+            stale=0 <= ttl <= self.settings.CACHE_STALE_SECONDS,
+        )
+        if not page.stale:
+            self.local_cache.set(
+                f"{self.pages_key}:{field}", (version, page), generation=generation
+            )
+        return page
+
+    async def set_page(
+        self, params: PageParams, page: RenderedPage, version: str, ex: int | None = None
     ) -> None:
         if ex is None:
             ex = self.settings.DEFAULT_CACHE_SECONDS
 
-        categories_json = json.dumps(
-            [category.model_dump() for category in categories], ensure_ascii=False
+        field = self._page_field(params)
+        generation = self.local_cache.generation
+        set_page = self.redis.register_script(SET_PAGE_SCRIPT)
+        stored = await set_page(
+            keys=[self.pages_key, self.version_key],
+            args=[
+                version,
+                field,
+                f"{version}\n{page.next_cursor or ''}\n{page.content}",
+                ex + self.settings.CACHE_STALE_SECONDS,
+            ],
         )
-        await self.redis.set(key, categories_json, ex=ex)
+        if stored:
+            self.local_cache.set(
+                f"{self.pages_key}:{field}", (version, page), generation=generation
+            )
+
+    async def get_version(self) -> str:
+        # the L1 key shares the pages prefix, so invalidating pages drops it as well
+        if version := self.local_cache.get(self.version_key):
+            return version
+
+        generation = self.local_cache.generation
+        version = await get_or_create_version(self.redis, self.version_key)
+        self.local_cache.set(self.version_key, version, generation=generation)
+        return version
+
+    async def delete_all_categories(self) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self.pages_key)
+            pipe.set(self.version_key, new_version())
+            pipe.publish(CACHE_INVALIDATION_CHANNEL, self.pages_key)
+            await pipe.execute()
+
+        self.local_cache.invalidate(self.pages_key)
 
-    async def delete_all_categories(self, key: str = "categories:all") -> None:
-        await self.redis.delete(key)
+    @staticmethod
+    def _page_field(params: PageParams) -> str:
+        return f"{params.after or ''}:{params.limit}"
@@ -1,30 +1,46 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 
-from src.core import SessionServiceBase, logger
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from src.core import Page, PageParams, RenderedPage, SessionServiceBase, logger
+from src.core.cache import SingleFlight
+from src.core.pagination import page_etag
 from src.tasks.exceptions import CategoryNameAlreadyExists
 from src.tasks.models import Category
 from src.tasks.repository import CategoryRepository
 from src.tasks.schemas import CategoryCreate, CategoryDb
-from src.tasks.services.cache import CategoryCacheService
+from src.tasks.services.cache import CategoryCacheService, TaskCacheService
 from src.users.auth.exceptions import AccessDenied
 from src.users.auth.schemas import UserPayload
 
+# background refreshes of stale pages, one per page of this worker
+category_page_refreshes = SingleFlight()
+
+CATEGORY_UNIQUE_ERRORS = {"ix_categories_name": CategoryNameAlreadyExists}
+
 
 @dataclass
 class CategoryService(SessionServiceBase):
     cat_repo: CategoryRepository
     cat_cache: CategoryCacheService
+    task_cache: TaskCacheService
+    session_maker: async_sessionmaker[AsyncSession]
 
-    async def get_all(self) -> list[CategoryDb]:
-        if cached_categories := await self.cat_cache.get_all_categories():
+    async def get_all(self, params: PageParams) -> RenderedPage:
+        # the same version as the ETag, so a page is never served under a newer one
+        version = await self.cat_cache.get_version()
+        if cached_page := await self.cat_cache.get_page(params, version):
             logger.debug("Using cache")
-            return cached_categories
+            if cached_page.stale:
+                category_page_refreshes.spawn(
+                    f"{params.after}:{params.limit}", lambda: self._refresh_page(params, version)
+                )
+            return cached_page
 
-        categories_from_db = await self.cat_repo.list()
-        categories = [CategoryDb.model_validate(category) for category in categories_from_db]
-        await self.cat_cache.set_all_categories(categories)
+        return await self._load_page(params, version)
 
-        return categories
+    async def get_etag(self, params: PageParams) -> str:
+        return page_etag(await self.cat_cache.get_version(), params)
 
     async def create(self, new_category: CategoryCreate, current_user: UserPayload) -> CategoryDb:
         if not current_user.is_admin:
@@ -35,10 +51,8 @@ class CategoryService(SessionServiceBase):
             )
             raise AccessDenied
 
-        await self._validate_name(new_category.name)
-
         category = await self.cat_repo.add(Category(**new_category.model_dump()))
-        await self.session.commit()
+        await self.commit(CATEGORY_UNIQUE_ERRORS)
         await self.cat_cache.delete_all_categories()
 
         logger.info("Category created: id=%s, name=%s", category.id, category.name)
@@ -66,7 +80,7 @@ class CategoryService(SessionServiceBase):
             setattr(category, key, value)
 
         category = await self.cat_repo.update(category)
-        await self.session.commit()
+        await self.commit(CATEGORY_UNIQUE_ERRORS)
         await self.cat_cache.delete_all_categories()
 
         logger.info("Category updated: id=%s", category.id)
@@ -87,9 +101,20 @@ class CategoryService(SessionServiceBase):
         await self.cat_repo.delete(category)
         await self.session.commit()
         await self.cat_cache.delete_all_categories()
+        await self.task_cache.delete_category_tasks(cat_id)
 
         logger.info("Category deleted: id=%s", category.id)
 
-    async def _validate_name(self, name: str) -> None:
-        if await self.cat_repo.get_by_name(name):
-            raise CategoryNameAlreadyExists
+    async def _load_page(self, params: PageParams, version: str) -> RenderedPage:
+        categories_from_db = await self.cat_repo.list(limit=params.limit + 1, after=params.after)
+        categories = [CategoryDb.model_validate(category) for category in categories_from_db]
+        page = RenderedPage.from_page(Page[CategoryDb].from_items(categories, params.limit))
+        await self.cat_cache.set_page(params, page, version)
+
+        return page
+
+    async def _refresh_page(self, params: PageParams, version: str) -> None:
+        # runs after the response is sent, when the request session is already closed
+        async with self.session_maker() as session:
+            service = replace(self, session=session, cat_repo=CategoryRepository(session=session))
+            await service._load_page(params, version)
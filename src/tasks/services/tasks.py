@@ -1,46 +1,94 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
+from typing import AsyncIterator, Collection
 
-from src.core import SessionServiceBase, logger
+from fastapi import HTTPException, status
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import selectinload
+
+from src.core import Page, PageParams, RenderedPage, SessionServiceBase, logger
+from src.core.pagination import page_etag
+from src.core.cache import SingleFlight
+from src.core.config import Settings
 from src.tasks.services.cache import TaskCacheService
-from src.tasks.exceptions import TaskNameAlreadyExists
+from src.tasks.exceptions import (
+    CategoryNotFound,
+    DuplicateBulkItem,
+    TaskNameAlreadyExists,
+    TaskNotFound,
+)
 from src.tasks.models import Task
 from src.tasks.repository import CategoryRepository, TaskRepository
-from src.tasks.schemas import TaskCreate, TaskDb
+from src.tasks.schemas import (
+    CategoryDb,
+    TaskBulkResult,
+    TaskCreate,
+    TaskDb,
+    TaskDeleteResponse,
+    TaskExpand,
+    TaskPatch,
+    TaskWithCategory,
+)
 from src.users.auth.exceptions import AccessDenied
 from src.users.auth.schemas import UserPayload
 
+# in-process coalescing of cache rebuilds, shared by every request of this worker
+task_cache_rebuilds = SingleFlight()
+
+TASK_UNIQUE_ERRORS = {"ix_tasks_name": TaskNameAlreadyExists}
+
 
 @dataclass
 class TaskService(SessionServiceBase):
     task_repo: TaskRepository
     task_cache: TaskCacheService
     cat_repo: CategoryRepository
+    settings: Settings
+    session_maker: async_sessionmaker[AsyncSession]
+
+    async def get_all(self, params: PageParams, expand: TaskExpand | None = None) -> RenderedPage:
+        if expand == TaskExpand.category:
+            return await self._get_all_with_category(params)
 
-    async def get_all(self) -> list[TaskDb]:
-        cached_tasks = await self.task_cache.get_all_tasks()
-        if cached_tasks is not None:
+        if cached_page := await self.task_cache.get_page(params):
             logger.debug("Using cache")
-            return cached_tasks
+            if cached_page.stale:
+                task_cache_rebuilds.spawn(self.task_cache.index_key, self._refresh_cache)
+            return cached_page
 
-        tasks_from_db = await self.task_repo.list()
+        # the version is read first, so the fill is dropped if a write lands in between
+        version = await self.task_cache.get_version()
+        tasks_from_db = await self.task_repo.list(limit=params.limit + 1, after=params.after)
         tasks = [TaskDb.model_validate(task) for task in tasks_from_db]
-        await self.task_cache.set_all_tasks(tasks)
 
-        return tasks
+        # a warm index only lacks the entries dropped by writes, the page read fills them;
+        # a cold one is rebuilt in full without making the reader wait
+        if not await self.task_cache.fill_tasks(tasks, version):
+            task_cache_rebuilds.spawn(self.task_cache.index_key, self._refresh_cache)
 
-    async def create(self, new_task: TaskCreate, current_user: UserPayload) -> TaskDb:
-        await self._validate_name(new_task.name)
+        return RenderedPage.from_page(Page[TaskDb].from_items(tasks, params.limit))
 
+    async def get_etag(self, params: PageParams) -> str:
+        return page_etag(await self.task_cache.get_version(), params)
+
+    async def create(self, new_task: TaskCreate, current_user: UserPayload) -> TaskDb:
         task = await self.task_repo.add(Task(creator_id=current_user.id, **new_task.model_dump()))
 
-        await self.session.commit()
-        await self.task_cache.delete_all_tasks()
+        await self.commit(TASK_UNIQUE_ERRORS)
+
+        task_db = TaskDb.model_validate(task)
+        await self.task_cache.set_task(task_db)
 
         logger.info("Task created: id=%s, name=%s", task.id, task.name)
 
-        return TaskDb.model_validate(task)
+        return task_db
+
+    async def get_by_id(
+        self, task_id: int, expand: TaskExpand | None = None
+    ) -> TaskDb | TaskWithCategory:
+        if expand == TaskExpand.category:
+            task = await self.task_repo.get_by_id_or_404(task_id, [selectinload(Task.category)])
+            return TaskWithCategory.model_validate(task)
 
-    async def get_by_id(self, task_id: int) -> TaskDb:
         task = await self.task_repo.get_by_id_or_404(task_id)
         return TaskDb.model_validate(task)
 
@@ -57,16 +105,19 @@ class TaskService(SessionServiceBase):
             )
             raise AccessDenied
 
+        old_category_id = task.category_id
         for key, value in updated_task.model_dump().items():
             setattr(task, key, value)
 
         task = await self.task_repo.update(task)
-        await self.session.commit()
-        await self.task_cache.delete_all_tasks()
+        await self.commit(TASK_UNIQUE_ERRORS)
+
+        task_db = TaskDb.model_validate(task)
+        await self.task_cache.set_task(task_db, old_category_id)
 
         logger.info("Task updated: id=%s", task.id)
 
-        return TaskDb.model_validate(task)
+        return task_db
 
     async def delete_by_id(self, task_id: int, current_user: UserPayload) -> None:
         task = await self.task_repo.get_by_id_or_404(task_id)
@@ -81,17 +132,265 @@ class TaskService(SessionServiceBase):
 
         await self.task_repo.delete(task)
         await self.session.commit()
-        await self.task_cache.delete_all_tasks()
+        await self.task_cache.delete_task(task_id, task.category_id)
 
         logger.info("Task deleted: id=%s", task.id)
 
-    async def get_tasks_by_category(self, cat_id: int) -> list[TaskDb]:
+    async def bulk_create(
+        self, new_tasks: list[TaskCreate], current_user: UserPayload
+    ) -> list[TaskBulkResult]:
+        results: list[TaskBulkResult | None] = [None] * len(new_tasks)
+        taken_names = await self._get_taken_names({new_task.name for new_task in new_tasks})
+        category_ids = await self._get_category_ids({t.category_id for t in new_tasks})
+
+        valid_indexes = []
+        for index, new_task in enumerate(new_tasks):
+            if new_task.name in taken_names:
+                error = TaskNameAlreadyExists()
+            elif new_task.category_id is not None and new_task.category_id not in category_ids:
+                error = CategoryNotFound()
+            else:
+                taken_names[new_task.name] = None
+                valid_indexes.append(index)
+                continue
+            results[index] = TaskBulkResult.from_error(error)
+
+        created = {}
+        if valid_indexes:
+            tasks = await self.task_repo.add_many_skip_taken_names(
+                [
+                    {"creator_id": current_user.id, **new_tasks[index].model_dump()}
+                    for index in valid_indexes
+                ]
+            )
+            await self.session.commit()
+
+            created = {task.name: TaskDb.model_validate(task) for task in tasks}
+            await self.task_cache.set_tasks(list(created.values()))
+
+            for index in valid_indexes:
+                # a name taken by a concurrent insert after the lookup is skipped by the INSERT
+                if task_db := created.get(new_tasks[index].name):
+                    results[index] = TaskBulkResult(
+                        status_code=status.HTTP_201_CREATED, id=task_db.id, task=task_db
+                    )
+                else:
+                    results[index] = TaskBulkResult.from_error(TaskNameAlreadyExists())
+
+        logger.info(
+            "Tasks created in bulk: created=%s, failed=%s",
+            len(created),
+            len(new_tasks) - len(created),
+        )
+
+        return results
+
+    async def bulk_update(
+        self, patches: list[TaskPatch], current_user: UserPayload
+    ) -> list[TaskBulkResult]:
+        results: list[TaskBulkResult | None] = [None] * len(patches)
+        changes = [patch.get_changes() for patch in patches]
+        tasks = await self._get_tasks({patch.id for patch in patches})
+        taken_names = await self._get_taken_names({c["name"] for c in changes if "name" in c})
+        category_ids = await self._get_category_ids({c.get("category_id") for c in changes})
+
+        updated: list[tuple[int, Task]] = []
+        old_category_ids = []
+        seen_ids = set()
+        for index, (patch, task_changes) in enumerate(zip(patches, changes)):
+            task = tasks.get(patch.id)
+            new_name = task_changes.get("name")
+            new_category_id = task_changes.get("category_id")
+
+            if not (error := self._check_access(task, patch.id, seen_ids, current_user)):
+                if new_name is not None and taken_names.get(new_name, task.id) != task.id:
+                    error = TaskNameAlreadyExists()
+                elif new_category_id is not None and new_category_id not in category_ids:
+                    error = CategoryNotFound()
+
+            seen_ids.add(patch.id)
+            if error:
+                results[index] = TaskBulkResult.from_error(error, patch.id)
+                continue
+
+            if new_name is not None:
+                taken_names.pop(task.name, None)
+                taken_names[new_name] = task.id
+
+            old_category_ids.append(task.category_id)
+            for key, value in task_changes.items():
+                setattr(task, key, value)
+            updated.append((index, await self.task_repo.update(task)))
+
+        if updated:
+            # the flush groups rows with the same changed columns into executemany UPDATEs;
+            # a name taken concurrently after the lookup fails the whole batch
+            await self.commit(TASK_UNIQUE_ERRORS)
+
+            tasks_db = [TaskDb.model_validate(task) for _, task in updated]
+            await self.task_cache.set_tasks(tasks_db, old_category_ids)
+
+            for (index, _), task_db in zip(updated, tasks_db):
+                results[index] = TaskBulkResult(
+                    status_code=status.HTTP_200_OK, id=task_db.id, task=task_db
+                )
+
+        logger.info(
+            "Tasks updated in bulk: updated=%s, failed=%s",
+            len(updated),
+            len(patches) - len(updated),
+        )
+
+        return results
+
+    async def bulk_delete(
+        self, task_ids: list[int], current_user: UserPayload
+    ) -> list[TaskBulkResult]:
+        results: list[TaskBulkResult | None] = [None] * len(task_ids)
+        tasks = await self._get_tasks(set(task_ids))
+
+        deleted: list[tuple[int, Task]] = []
+        seen_ids = set()
+        for index, task_id in enumerate(task_ids):
+            task = tasks.get(task_id)
+            error = self._check_access(task, task_id, seen_ids, current_user)
+
+            seen_ids.add(task_id)
+            if error:
+                results[index] = TaskBulkResult.from_error(error, task_id)
+                continue
+
+            deleted.append((index, task))
+
+        if deleted:
+            await self.task_repo.delete_many([task.id for _, task in deleted])
+            await self.session.commit()
+            await self.task_cache.delete_tasks(
+                [task.id for _, task in deleted], [task.category_id for _, task in deleted]
+            )
+
+            for index, task in deleted:
+                results[index] = TaskBulkResult(
+                    status_code=status.HTTP_200_OK, id=task.id, detail=TaskDeleteResponse().detail
+                )
+
+        logger.info(
+            "Tasks deleted in bulk: deleted=%s, failed=%s",
+            len(deleted),
+            len(task_ids) - len(deleted),
+        )
+
+        return results
+
+    async def get_tasks_by_category(
+        self, cat_id: int, expand: TaskExpand | None = None
+    ) -> RenderedPage:
+        if expand == TaskExpand.category:
+            return await self._get_tasks_by_category_with_category(cat_id)
+
+        if cached_tasks := await self.task_cache.get_category_tasks(cat_id):
+            logger.debug("Using cache")
+            return cached_tasks
+
+        version = await self.task_cache.get_version()
         category = await self.cat_repo.get_by_id_or_404(cat_id)
 
         tasks = await self.task_repo.get_by_category_id(category.id)
+        page = RenderedPage.from_json_items(
+            [TaskDb.model_validate(task).model_dump_json() for task in tasks]
+        )
+        await self.task_cache.set_category_tasks(cat_id, page, version)
+
+        return page
 
-        return [TaskDb.model_validate(task) for task in tasks]
+    async def export(self) -> AsyncIterator[str]:
+        chunk_size = self.settings.EXPORT_CHUNK_SIZE
+        lines = []
+        async for task in self.task_repo.stream(yield_per=chunk_size):
+            lines.append(TaskDb.model_validate(task).model_dump_json())
+            if len(lines) >= chunk_size:
+                yield "\n".join(lines) + "\n"
+                lines.clear()
 
-    async def _validate_name(self, name: str) -> None:
-        if await self.task_repo.get_by_name(name):
-            raise TaskNameAlreadyExists
+        if lines:
+            yield "\n".join(lines) + "\n"
+
+        logger.info("Tasks exported")
+
+    # expanded responses are not cached: the cached pages hold tasks only, and a category
+    # change does not touch the task version they are checked against
+    async def _get_all_with_category(self, params: PageParams) -> RenderedPage:
+        tasks_from_db = await self.task_repo.list(
+            limit=params.limit + 1, after=params.after, options=[selectinload(Task.category)]
+        )
+        tasks = [TaskWithCategory.model_validate(task) for task in tasks_from_db]
+
+        return RenderedPage.from_page(Page[TaskWithCategory].from_items(tasks, params.limit))
+
+    async def _get_tasks_by_category_with_category(self, cat_id: int) -> RenderedPage:
+        category = CategoryDb.model_validate(await self.cat_repo.get_by_id_or_404(cat_id))
+
+        # every task shares the category that was just loaded, there is nothing to join
+        tasks = await self.task_repo.get_by_category_id(cat_id)
+        return RenderedPage.from_json_items(
+            [
+                TaskWithCategory(
+                    **TaskDb.model_validate(task).model_dump(), category=category
+                ).model_dump_json()
+                for task in tasks
+            ]
+        )
+
+    async def _refresh_cache(self) -> None:
+        # runs on its own session: the request session may be closed before it finishes
+        async with self.session_maker() as session:
+            service = replace(
+                self,
+                session=session,
+                task_repo=TaskRepository(session=session),
+                cat_repo=CategoryRepository(session=session),
+            )
+            await service._rebuild_cache()
+
+    async def _rebuild_cache(self) -> None:
+        async with self.task_cache.rebuild_lock() as acquired:
+            if not acquired:
+                logger.debug("Task cache is being rebuilt by another worker")
+                await self.task_cache.wait_ready()
+                return
+
+            version = await self.task_cache.get_version()
+            await self.task_cache.rebuild(self._iter_task_chunks(), version)
+
+    async def _iter_task_chunks(self) -> AsyncIterator[list[TaskDb]]:
+        after = None
+        chunk_size = self.settings.CACHE_REBUILD_CHUNK_SIZE
+        while tasks := await self.task_repo.list(limit=chunk_size, after=after):
+            yield [TaskDb.model_validate(task) for task in tasks]
+            after = tasks[-1].id
+
+    async def _get_tasks(self, task_ids: Collection[int]) -> dict[int, Task]:
+        return {task.id: task for task in await self.task_repo.get_by_ids(task_ids)}
+
+    async def _get_taken_names(self, names: Collection[str]) -> dict[str, int | None]:
+        if not names:
+            return {}
+        return {task.name: task.id for task in await self.task_repo.get_by_names(names)}
+
+    async def _get_category_ids(self, category_ids: set[int | None]) -> set[int]:
+        category_ids.discard(None)
+        if not category_ids:
+            return set()
+        return {category.id for category in await self.cat_repo.get_by_ids(category_ids)}
+
+    @staticmethod
+    def _check_access(
+        task: Task | None, task_id: int, seen_ids: set[int], current_user: UserPayload
+    ) -> HTTPException | None:
+        if task_id in seen_ids:
+            return DuplicateBulkItem()
+        if task is None:
+            return TaskNotFound()
+        if not (current_user.is_admin or current_user.id == task.creator_id):
+            return AccessDenied()
+        return None
@@ -64,3 +64,24 @@ class ProviderError(HTTPException):
         if provider:
             detail += f": {provider.value}"
         super().__init__(detail=detail, status_code=status_code)
+
+
+class HashingOverloaded(HTTPException):
+    def __init__(
+        self,
+        detail: str = "Server is busy, try again later",
+        status_code: status = status.HTTP_503_SERVICE_UNAVAILABLE,
+    ):
+        super().__init__(detail=detail, status_code=status_code)
+
+
+class TooManyLoginAttempts(HTTPException):
+    def __init__(
+        self,
+        retry_after: int,
+        detail: str = "Too many login attempts, try again later",
+        status_code: status = status.HTTP_429_TOO_MANY_REQUESTS,
+    ):
+        super().__init__(
+            detail=detail, status_code=status_code, headers={"Retry-After": str(retry_after)}
+        )
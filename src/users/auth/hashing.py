@@ -0,0 +1,98 @@
+import asyncio
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable
+
+from fastapi import FastAPI
+from passlib.context import CryptContext
+
+from src.core.config import Settings
+from src.core.log_config import logger
+from src.users.auth.exceptions import HashingOverloaded
+
+
+class PasswordHasher:
+    """Runs bcrypt in a bounded thread pool, so hashing never blocks the event loop.
+
+    bcrypt releases the GIL while it works, so threads hash in parallel. Calls beyond
+    the workers wait in a queue of queue_size; once that is full they fail fast.
+    """
+
+    def __init__(self, pwd_context: CryptContext, workers: int, queue_size: int) -> None:
+        self.pwd_context = pwd_context
+        self.workers = workers
+        self.queue_size = queue_size
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="hasher")
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._run(self.pwd_context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._run(self.pwd_context.verify, password, hashed_password)
+
+    async def verify_and_update(
+        self, password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        # the new hash is only returned when the stored one is behind the current policy
+        return await self._run(self.pwd_context.verify_and_update, password, hashed_password)
+
+    async def _run[T](self, func: Callable[..., T], *args: Any) -> T:
+        if self._pending >= self.workers + self.queue_size:
+            self._rejected += 1
+            logger.warning("Password hashing queue is full: pending=%s", self._pending)
+            raise HashingOverloaded
+
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        future = self._executor.submit(func, *args)
+        self._pending += 1
+        # a cancelled caller does not free the worker: the slot is released once the thread is
+        # done, on the loop since the callback runs in the worker thread
+        future.add_done_callback(
+            lambda done: loop.call_soon_threadsafe(self._finish, done, time.perf_counter() - start)
+        )
+        return await asyncio.wrap_future(future)
+
+    def _finish(self, future: Future, latency: float) -> None:
+        self._pending -= 1
+        if future.cancelled():
+            return
+
+        self._completed += 1
+        self._latency_total += latency
+        self._latency_max = max(self._latency_max, latency)
+
+    def metrics(self) -> dict:
+        # latency covers the queue wait as well, it is what a login actually pays
+        return {
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "running": min(self._pending, self.workers),
+            "queued": max(self._pending - self.workers, 0),
+            "completed": self._completed,
+            "rejected": self._rejected,
+            "avg_latency_ms": (
+                self._latency_total / self._completed * 1000 if self._completed else 0.0
+            ),
+            "max_latency_ms": self._latency_max * 1000,
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def password_hasher_startup(app: FastAPI, settings: Settings) -> None:
+    app.state.password_hasher = PasswordHasher(
+        pwd_context=settings.PWD_CONTEXT,
+        workers=settings.PASSWORD_HASH_WORKERS,
+        queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    )
+
+
+async def password_hasher_shutdown(app: FastAPI) -> None:
+    app.state.password_hasher.shutdown()
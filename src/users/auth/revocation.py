@@ -0,0 +1,132 @@
+import asyncio
+import time
+from itertools import batched
+
+from fastapi import FastAPI
+from redis.asyncio import Redis
+
+from src.core.cache import LocalCache
+from src.core.config import Settings
+from src.core.log_config import logger
+
+REVOCATION_CHANNEL = "auth:revocations"
+REVOKED_KEY_PREFIX = "revoked_jtis"
+
+
+def revoked_key(user_id: int | str) -> str:
+    return f"{REVOKED_KEY_PREFIX}:{user_id}"
+
+
+class RevocationIndex:
+    """In-process view of the revocations kept in redis.
+
+    Revoked jtis are an exact copy. Logout-all timestamps are cached per user on first
+    use, in a bounded LRU whose ttl limits how long a lost message can go unnoticed;
+    users without a timestamp are cached as 0. The index is only trusted while its
+    listener is subscribed and synced; until then every check is answered with
+    "maybe revoked", which sends the caller to redis.
+    """
+
+    def __init__(self, logout_ts: LocalCache) -> None:
+        self.ready = False
+        self._revoked_jtis: set[str] = set()
+        self._logout_ts = logout_ts
+
+    def might_be_revoked(self, jti: str, user_id: str, iat: int) -> bool:
+        if not self.ready or jti in self._revoked_jtis:
+            return True
+
+        logout_ts = self._logout_ts.get(user_id)
+        # an unknown user has to be looked up in redis
+        return logout_ts is None or logout_ts >= iat
+
+    def add_revoked(self, jti: str) -> None:
+        self._revoked_jtis.add(jti)
+
+    def add_logout(self, user_id: str, ts: int) -> None:
+        # a late message or a slow redis read never moves the timestamp back
+        self._logout_ts.set(user_id, max(ts, self._logout_ts.get(user_id) or 0))
+
+    def apply(self, message: str) -> None:
+        kind, _, value = message.partition(":")
+        if kind == "revoked":
+            self.add_revoked(value)
+        elif kind == "logout_ts":
+            user_id, _, ts = value.partition(":")
+            self.add_logout(user_id, int(ts))
+        else:
+            logger.warning("Unknown revocation message: %s", message)
+
+    async def sync(self, redis_bl: Redis) -> None:
+        # entries that expired in redis drop out here, so the index never outgrows it
+        revoked_jtis = set()
+        revoked_keys = redis_bl.scan_iter(match=f"{REVOKED_KEY_PREFIX}:*", count=1000)
+        for keys in batched([key async for key in revoked_keys], 1000):
+            async with redis_bl.pipeline(transaction=False) as pipe:
+                for key in keys:
+                    pipe.hkeys(key)
+                for jtis in await pipe.execute():
+                    revoked_jtis.update(jtis)
+
+        legacy_keys = redis_bl.scan_iter(match="revoked:*", count=1000)
+        revoked_jtis.update([key.removeprefix("revoked:") async for key in legacy_keys])
+
+        self._revoked_jtis = revoked_jtis
+        # messages may have been lost before this sync, cached timestamps are reloaded on use
+        self._logout_ts.invalidate()
+        self.ready = True
+
+    def __len__(self) -> int:
+        return len(self._revoked_jtis) + len(self._logout_ts)
+
+
+async def listen_revocations(
+    redis_bl: Redis, revocation_index: RevocationIndex, resync_seconds: float
+) -> None:
+    while True:
+        try:
+            async with redis_bl.pubsub() as pubsub:
+                # subscribe before syncing, so nothing published in between is missed;
+                # messages are not read while a sync runs, they wait in the connection
+                await pubsub.subscribe(REVOCATION_CHANNEL)
+                await revocation_index.sync(redis_bl)
+                synced_at = time.monotonic()
+
+                while True:
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                    if message is not None:
+                        revocation_index.apply(message["data"])
+
+                    if time.monotonic() - synced_at >= resync_seconds:
+                        await revocation_index.sync(redis_bl)
+                        synced_at = time.monotonic()
+        except asyncio.CancelledError:
+            revocation_index.ready = False
+            raise
+        except Exception as e:
+            logger.warning("Revocation listener failed: %r", e)
+            revocation_index.ready = False
+            await asyncio.sleep(1)
+
+
+async def revocation_index_startup(app: FastAPI, settings: Settings) -> None:
+    app.state.revocation_index = RevocationIndex(
+        logout_ts=LocalCache(
+            maxsize=settings.LOGOUT_TS_CACHE_MAX_ITEMS, ttl=settings.LOGOUT_TS_CACHE_SECONDS
+        )
+    )
+    app.state.revocation_listener = asyncio.create_task(
+        listen_revocations(
+            app.state.redis_blacklist,
+            app.state.revocation_index,
+            settings.REVOCATION_RESYNC_SECONDS,
+        )
+    )
+
+
+async def revocation_index_shutdown(app: FastAPI) -> None:
+    app.state.revocation_listener.cancel()
+    try:
+        await app.state.revocation_listener
+    except asyncio.CancelledError:
+        pass
@@ -1,4 +1,4 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
 
 from src.users.auth.schemas import LogoutResponse, RefreshToken, Tokens, UserLogin
 from src.users.dependencies import AuthServiceDep, CurrentUserDep
@@ -7,8 +7,9 @@ router = APIRouter(prefix="/auth", tags=["auth"])
 
 
 @router.post("/token", response_model=Tokens)
-async def login(body: UserLogin, service: AuthServiceDep) -> Tokens:
-    return await service.login(body)
+async def login(body: UserLogin, request: Request, service: AuthServiceDep) -> Tokens:
+    client_ip = request.client.host if request.client else None
+    return await service.login(body, client_ip)
 
 
 @router.post("/refresh", response_model=Tokens)
@@ -3,6 +3,7 @@ from src.users.auth.schemas.auth import (
     TokenType,
     UserPayload,
     AccessTokenPayload,
+    CompactAccessTokenPayload,
     RefreshTokenPayload,
     RefreshToken,
     LogoutResponse,
@@ -22,6 +23,7 @@ __all__ = [
     TokenType,
     UserPayload,
     AccessTokenPayload,
+    CompactAccessTokenPayload,
     RefreshTokenPayload,
     RefreshToken,
     LogoutResponse,
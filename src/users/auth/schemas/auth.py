@@ -1,6 +1,7 @@
 from enum import Enum
+from typing import Literal
 
-from pydantic import BaseModel, ConfigDict, EmailStr
+from pydantic import BaseModel, ConfigDict, EmailStr, Field
 
 
 class TokenType(str, Enum):
@@ -25,7 +26,9 @@ class Payload(BaseModel):
 
 class UserPayload(Payload):
     id: int
+    email: EmailStr | None = None  # not carried by compact access tokens
     jti: str | None = None
+    iat: int | None = None  # set for the current user, when its token pair was issued
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -42,6 +45,31 @@ class AccessTokenPayload(RefreshTokenPayload, Payload):
     pass
 
 
+class CompactAccessTokenPayload(BaseModel):
+    """Access token under short claim names and without the email.
+
+    Endpoints that need more than the id, username and admin flag load the user.
+    """
+
+    sub: str
+    jti: str
+    iat: int
+    exp: int
+    typ: Literal["at"] = "at"
+    username: str = Field(alias="usr")
+    is_admin: bool = Field(alias="adm")
+
+    model_config = ConfigDict(populate_by_name=True)
+
+    @property
+    def type(self) -> TokenType:
+        return TokenType.access
+
+    @property
+    def email(self) -> None:
+        return None
+
+
 class LogoutResponse(BaseModel):
     detail: str = "Successfully logged out"
 
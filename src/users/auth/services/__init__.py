@@ -1,10 +1,12 @@
 from src.users.auth.services.security import TokenBlacklistService, SecurityService
+from src.users.auth.services.throttle import LoginThrottleService
 from src.users.auth.services.auth import AuthService, OAuthService, YandexService, GoogleService
 
 
 __all__ = [
     TokenBlacklistService,
     SecurityService,
+    LoginThrottleService,
     AuthService,
     OAuthService,
     GoogleService,
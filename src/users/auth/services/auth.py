@@ -16,7 +16,8 @@ from src.users.auth.schemas import (
     UserLogin,
     UserPayload,
 )
-from src.users.auth.services import SecurityService, TokenBlacklistService
+from src.users.auth.services import LoginThrottleService, SecurityService, TokenBlacklistService
+from src.users.profile.cache import UserCacheService
 from src.users.profile.repository import UserRepository
 from src.users.profile.service import UserService
 
@@ -26,16 +27,36 @@ class AuthService(SessionServiceBase):
     user_repo: UserRepository
     token_bl: TokenBlacklistService
     security: SecurityService
+    throttle: LoginThrottleService
+    user_cache: UserCacheService
+
+    async def login(self, body: UserLogin, client_ip: str | None = None) -> Tokens:
+        attempt = await self.throttle.check(body.username, client_ip)
 
-    async def login(self, body: UserLogin) -> Tokens:
         user = await self.user_repo.get_by_username(body.username)
-        if not user or not self.security.verify_password(body.password, str(user.hashed_password)):
+        verified, new_hashed_password = False, None
+        if user:
+            verified, new_hashed_password = await self.security.verify_and_update_password(
+                body.password, str(user.hashed_password)
+            )
+        if not verified:
             logger.info(
                 "Failed login: username=%s, reason=Invalid username or password", body.username
             )
             raise AuthenticationError
 
-        tokens = self.security.create_tokens(UserPayload.model_validate(user))
+        # only failed attempts count toward the limits
+        await self.throttle.forget(body.username, client_ip, attempt)
+
+        # the hash was made with an older scheme or cost, upgrade it while we have the password
+        if new_hashed_password is not None:
+            user.hashed_password = new_hashed_password
+            await self.commit()
+            logger.info("Password rehashed: username=%s", user.username)
+
+        # the snapshot is left to refresh, whose fill is guarded against profile changes
+        user_payload = UserPayload.model_validate(user)
+        tokens = self.security.create_tokens(user_payload)
 
         logger.info("User logged in: username=%s", user.username)
 
@@ -45,25 +66,39 @@ class AuthService(SessionServiceBase):
         payload: RefreshTokenPayload = await self.security.decode_validate_token(
             body.refresh_token, TokenType.refresh
         )
-        user = await self.user_repo.get_by_id(int(payload.sub))
+        user = await self._get_user_payload(int(payload.sub))
         if not user:
             logger.warning("Failed token refresh: user not found (sub=%s)", payload.sub)
             raise TokenError
 
-        new_tokens = self.security.create_tokens(UserPayload.model_validate(user))
+        new_tokens = self.security.create_tokens(user)
 
         logger.info("Tokens updated: username=%s", user.username)
 
         return new_tokens
 
     async def logout(self, current_user: UserPayload) -> None:
-        await self.token_bl.blacklist_tokens(current_user.jti)
+        await self.token_bl.blacklist_tokens(current_user.jti, current_user.id, current_user.iat)
         logger.info("User logged out: username=%s", current_user.username)
 
     async def logout_all(self, current_user: UserPayload) -> None:
         await self.token_bl.set_logout_timestamp(current_user.id)
         logger.info("User logged out from all devices: username=%s", current_user.username)
 
+    async def _get_user_payload(self, user_id: int) -> UserPayload | None:
+        if user := await self.user_cache.get_user(user_id):
+            return user
+
+        # read before the row, so a profile change committed meanwhile voids the fill
+        version = await self.user_cache.get_version(user_id)
+        user_from_db = await self.user_repo.get_by_id(user_id)
+        if not user_from_db:
+            return None
+
+        user = UserPayload.model_validate(user_from_db)
+        await self.user_cache.set_user(user, version)
+        return user
+
 
 @dataclass
 class OAuthService:
@@ -6,10 +6,15 @@ import jwt
 from redis.asyncio import Redis
 
 from src.core import logger
+from src.core.cache import LocalCache
 from src.core.config import Settings
+from src.users.auth.hashing import PasswordHasher
+from src.users.auth.revocation import REVOCATION_CHANNEL, RevocationIndex, revoked_key
+from src.users.auth.token_cache import token_digest
 from src.users.auth.exceptions import InvalidTokenType, TokenError, TokenExpired, TokenRevoked
 from src.users.auth.schemas import (
     AccessTokenPayload,
+    CompactAccessTokenPayload,
     RefreshTokenPayload,
     Tokens,
     TokenType,
@@ -21,18 +26,32 @@ from src.users.auth.schemas import (
 class TokenBlacklistService:
     redis_bl: Redis
     settings: Settings
+    revocation_index: RevocationIndex | None = None
 
-    # blacklist single jwt pair for logout scenario
-    async def blacklist_tokens(self, jti: str, ex_seconds: int | None = None) -> None:
-        if ex_seconds is None:
-            ex_seconds = self.settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+    # blacklist single jwt pair for logout scenario; the pair's jtis are grouped in one hash
+    # per user, each field expiring together with the pair's refresh token
+    async def blacklist_tokens(self, jti: str, user_id: int, iat: int | None = None) -> None:
+        refresh_seconds = self.settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        now_ts = int(datetime.datetime.now(datetime.UTC).timestamp())
+        ex_seconds = refresh_seconds if iat is None else iat + refresh_seconds - now_ts
+        if ex_seconds <= 0:
+            # the whole pair has expired already, there is nothing left to revoke
+            return
 
-        await self.redis_bl.set(f"revoked:{jti}", "1", ex=ex_seconds)
+        key = revoked_key(user_id)
+        async with self.redis_bl.pipeline(transaction=True) as pipe:
+            pipe.hset(key, jti, "1")
+            pipe.hexpire(key, ex_seconds, jti)
+            pipe.publish(REVOCATION_CHANNEL, f"revoked:{jti}")
+            await pipe.execute()
+
+        if self.revocation_index is not None:
+            self.revocation_index.add_revoked(jti)
 
         logger.info("One pair of tokens revoked: jti=%s", jti)
 
-    async def is_blacklisted(self, jti: str) -> bool:
-        return await self.redis_bl.exists(f"revoked:{jti}") == 1
+    async def is_blacklisted(self, jti: str, user_id: str) -> bool:
+        return await self.redis_bl.hexists(revoked_key(user_id), jti)
 
     # blacklist all jwt pairs given to user for logout-all scenario
     async def set_logout_timestamp(self, user_id: int, ex_seconds: int | None = None) -> None:
@@ -40,7 +59,13 @@ class TokenBlacklistService:
             ex_seconds = self.settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
 
         now_ts = int(datetime.datetime.now(datetime.UTC).timestamp())
-        await self.redis_bl.set(f"logout_ts:{user_id}", str(now_ts), ex=ex_seconds)
+        async with self.redis_bl.pipeline(transaction=True) as pipe:
+            pipe.set(f"logout_ts:{user_id}", str(now_ts), ex=ex_seconds)
+            pipe.publish(REVOCATION_CHANNEL, f"logout_ts:{user_id}:{now_ts}")
+            await pipe.execute()
+
+        if self.revocation_index is not None:
+            self.revocation_index.add_logout(str(user_id), now_ts)
 
         logger.info("All tokens revoked: user_id=%s", user_id)
 
@@ -48,17 +73,46 @@ class TokenBlacklistService:
         ts = await self.redis_bl.get(f"logout_ts:{user_id}")
         return int(ts) if ts else None
 
+    # both revocation checks in one round trip, it runs on every authenticated request;
+    # tokens the local index knows to be valid skip redis altogether, and the logout
+    # timestamp read here is remembered for the user's next requests
+    async def is_revoked(self, jti: str, user_id: str, iat: int) -> bool:
+        if self.revocation_index is not None and not self.revocation_index.might_be_revoked(
+            jti, user_id, iat
+        ):
+            return False
+
+        async with self.redis_bl.pipeline(transaction=False) as pipe:
+            pipe.hexists(revoked_key(user_id), jti)
+            # pairs revoked before the per-user hashes, gone once their refresh tokens expire
+            pipe.exists(f"revoked:{jti}")
+            pipe.get(f"logout_ts:{user_id}")
+            revoked, legacy_revoked, logout_ts = await pipe.execute()
+
+        logout_ts = int(logout_ts) if logout_ts is not None else 0
+        if self.revocation_index is not None:
+            self.revocation_index.add_logout(user_id, logout_ts)
+
+        return revoked or legacy_revoked == 1 or logout_ts >= iat
+
 
 @dataclass
 class SecurityService:
     token_bl: TokenBlacklistService
     settings: Settings
+    hasher: PasswordHasher
+    token_cache: LocalCache
 
-    def hash_password(self, password: str) -> str:
-        return self.settings.PWD_CONTEXT.hash(password)
+    async def hash_password(self, password: str) -> str:
+        return await self.hasher.hash(password)
 
-    def verify_password(self, password: str, hashed_password: str) -> bool:
-        return self.settings.PWD_CONTEXT.verify(password, hashed_password)
+    async def verify_password(self, password: str, hashed_password: str) -> bool:
+        return await self.hasher.verify(password, hashed_password)
+
+    async def verify_and_update_password(
+        self, password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        return await self.hasher.verify_and_update(password, hashed_password)
 
     def get_token_expiration(self, token_type: TokenType) -> datetime:
         expiration = datetime.datetime.now(datetime.UTC)
@@ -76,7 +130,16 @@ class SecurityService:
         exp = int(self.get_token_expiration(token_type))
         iat = int(datetime.datetime.now(datetime.UTC).timestamp())
 
-        if token_type == TokenType.access:
+        if token_type == TokenType.access and self.settings.COMPACT_ACCESS_TOKENS:
+            token_payload = CompactAccessTokenPayload(
+                sub=str(payload.id),
+                exp=exp,
+                iat=iat,
+                jti=jti,
+                username=payload.username,
+                is_admin=payload.is_admin,
+            )
+        elif token_type == TokenType.access:
             token_payload = AccessTokenPayload(
                 sub=str(payload.id),
                 exp=exp,
@@ -100,7 +163,7 @@ class SecurityService:
             raise InvalidTokenType
 
         encoded_jwt = jwt.encode(
-            token_payload.model_dump(),
+            token_payload.model_dump(by_alias=True),
             key=self.settings.JWT_SECRET_KEY,
             algorithm=self.settings.JWT_ALGORITHM,
         )
@@ -117,35 +180,44 @@ class SecurityService:
 
     async def decode_validate_token(
         self, token: str, token_type: TokenType
-    ) -> AccessTokenPayload | RefreshTokenPayload:
+    ) -> AccessTokenPayload | CompactAccessTokenPayload | RefreshTokenPayload:
+        # clients repeat a token until it expires, so its signature is only verified once;
+        # revocation is still checked on every call
+        cache_key = f"{token_type.value}:{token_digest(token)}"
+        token_payload = self.token_cache.get(cache_key)
+        if token_payload is None:
+            token_payload = self._decode_token(token, token_type)
+            now_ts = datetime.datetime.now(datetime.UTC).timestamp()
+            self.token_cache.set(cache_key, token_payload, ttl=token_payload.exp - now_ts)
+
+        if await self.token_bl.is_revoked(
+            token_payload.jti, token_payload.sub, int(token_payload.iat)
+        ):
+            logger.warning(
+                "Token has been revoked: sub=%s, type=%s", token_payload.sub, token_type.value
+            )
+            raise TokenRevoked
+
+        return token_payload
+
+    def _decode_token(
+        self, token: str, token_type: TokenType
+    ) -> AccessTokenPayload | CompactAccessTokenPayload | RefreshTokenPayload:
         try:
             payload = jwt.decode(
                 token, key=self.settings.JWT_SECRET_KEY, algorithms=[self.settings.JWT_ALGORITHM]
             )
 
+            if token_type == TokenType.access and payload.get("typ") == "at":
+                return CompactAccessTokenPayload.model_validate(payload)
+
             if payload.get("type") != token_type.value:
                 logger.error("Invalid token type: %s", payload.get("type"))
                 raise InvalidTokenType
 
             if token_type == TokenType.access:
-                token_payload = AccessTokenPayload(**payload)
-            else:
-                token_payload = RefreshTokenPayload(**payload)
-
-            if await self.token_bl.is_blacklisted(token_payload.jti):
-                logger.warning(
-                    "Token has been revoked: sub=%s, type=%s", token_payload.sub, token_type.value
-                )
-                raise TokenRevoked
-
-            logout_ts = await self.token_bl.get_logout_timestamp(token_payload.sub)
-            if logout_ts and logout_ts >= int(token_payload.iat):
-                logger.warning(
-                    "Token has been revoked: sub=%s, type=%s", token_payload.sub, token_type.value
-                )
-                raise TokenRevoked
-
-            return token_payload
+                return AccessTokenPayload(**payload)
+            return RefreshTokenPayload(**payload)
 
         except jwt.exceptions.ExpiredSignatureError:
             logger.warning("Token expired")
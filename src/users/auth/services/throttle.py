@@ -0,0 +1,68 @@
+import uuid
+from dataclasses import dataclass
+
+from src.core import RedisServiceBase, logger
+from src.users.auth.exceptions import TooManyLoginAttempts
+
+# sliding window log: one sorted set of attempt times per key. ARGV[1] is the window in ms,
+# ARGV[2] a unique member, then one limit per key. An attempt is recorded in every window
+# only when all of them still have room; otherwise returns the ms until the busiest one does
+SLIDING_WINDOW_SCRIPT = """
+local time = redis.call('TIME')
+local now = tonumber(time[1]) * 1000 + math.floor(tonumber(time[2]) / 1000)
+local window = tonumber(ARGV[1])
+local retry_after = 0
+for i, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    local limit = tonumber(ARGV[2 + i])
+    local count = redis.call('ZCARD', key)
+    if count >= limit then
+        local oldest = redis.call('ZRANGE', key, count - limit, count - limit, 'WITHSCORES')
+        retry_after = math.max(retry_after, tonumber(oldest[2]) + window - now)
+    end
+end
+if retry_after > 0 then
+    return retry_after
+end
+for _, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, ARGV[2])
+    redis.call('PEXPIRE', key, window)
+end
+return 0
+"""
+
+
+@dataclass
+class LoginThrottleService(RedisServiceBase):
+    key_prefix: str = "login_attempts"
+
+    async def check(self, username: str, client_ip: str | None) -> str:
+        # returns the id of the recorded attempt, so a successful login can take it back
+        keys, limits = self._windows(username, client_ip)
+        attempt = uuid.uuid4().hex
+
+        sliding_window = self.redis.register_script(SLIDING_WINDOW_SCRIPT)
+        retry_after_ms = await sliding_window(
+            keys=keys,
+            args=[self.settings.LOGIN_LIMIT_WINDOW_SECONDS * 1000, attempt, *limits],
+        )
+        if retry_after_ms:
+            logger.warning("Login throttled: username=%s, ip=%s", username, client_ip)
+            raise TooManyLoginAttempts(retry_after=-(-retry_after_ms // 1000))
+
+        return attempt
+
+    async def forget(self, username: str, client_ip: str | None, attempt: str) -> None:
+        keys, _ = self._windows(username, client_ip)
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.zrem(key, attempt)
+            await pipe.execute()
+
+    def _windows(self, username: str, client_ip: str | None) -> tuple[list[str], list[int]]:
+        keys = [f"{self.key_prefix}:username:{username.lower()}"]
+        limits = [self.settings.LOGIN_LIMIT_PER_USERNAME]
+        if client_ip and self.settings.LOGIN_LIMIT_PER_IP:
+            keys.append(f"{self.key_prefix}:ip:{client_ip}")
+            limits.append(self.settings.LOGIN_LIMIT_PER_IP)
+        return keys, limits
@@ -0,0 +1,18 @@
+import hashlib
+
+from fastapi import FastAPI
+
+from src.core.cache import LocalCache
+from src.core.config import Settings
+
+
+def token_digest(token: str) -> str:
+    # the raw token is a bearer credential, it is never kept in memory as a key
+    return hashlib.blake2b(token.encode(), digest_size=16).hexdigest()
+
+
+async def token_cache_startup(app: FastAPI, settings: Settings) -> None:
+    # validated payloads by token digest, every entry expires together with its token
+    app.state.token_cache = LocalCache(
+        maxsize=settings.TOKEN_CACHE_MAX_ITEMS, ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    )
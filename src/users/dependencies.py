@@ -1,26 +1,40 @@
-from typing import Annotated
+from typing import Annotated, Any, Awaitable, Callable
 
-from fastapi import Depends
+from fastapi import Depends, Request
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 
 from src.core import (
     AsyncClientDep,
     BrokerClientDep,
     RedisBlacklistDep,
+    RedisCacheDep,
+    ReadSessionDep,
     SessionDep,
     SettingsDep,
     AuthSettingsDep,
+    logger,
 )
+from src.core.cache import LocalCache
 from src.users.auth.clients import GoogleClient, YandexClient
 from src.users.auth.exceptions import AuthorizationError, TokenError
-from src.users.auth.schemas import AccessTokenPayload, Provider, TokenType, UserPayload
+from src.users.auth.hashing import PasswordHasher
+from src.users.auth.revocation import RevocationIndex
+from src.users.auth.schemas import (
+    AccessTokenPayload,
+    CompactAccessTokenPayload,
+    Provider,
+    TokenType,
+    UserPayload,
+)
 from src.users.auth.services import (
     AuthService,
     GoogleService,
+    LoginThrottleService,
     SecurityService,
     TokenBlacklistService,
     YandexService,
 )
+from src.users.profile.cache import UserCacheService
 from src.users.profile.clients import MailClient
 from src.users.profile.repository import UserRepository
 from src.users.profile.service import UserService
@@ -35,56 +49,128 @@ MailClientDep = Annotated[MailClient, Depends(get_mail_client)]
 
 
 # security dependencies
+async def get_revocation_index(request: Request) -> RevocationIndex:
+    revocation_index = request.app.state.revocation_index
+    if revocation_index is None:
+        message = "Revocation index not initialized"
+        logger.error(message)
+        raise RuntimeError(message)
+    return revocation_index
+
+
+RevocationIndexDep = Annotated[RevocationIndex, Depends(get_revocation_index)]
+
+
 async def get_token_bl_service(
-    redis_bl: RedisBlacklistDep, settings: SettingsDep
+    redis_bl: RedisBlacklistDep, revocation_index: RevocationIndexDep, settings: SettingsDep
 ) -> TokenBlacklistService:
-    return TokenBlacklistService(redis_bl=redis_bl, settings=settings)
+    return TokenBlacklistService(
+        redis_bl=redis_bl, settings=settings, revocation_index=revocation_index
+    )
 
 
 TokenBLServiceDep = Annotated[TokenBlacklistService, Depends(get_token_bl_service)]
 
 
+async def get_password_hasher(request: Request) -> PasswordHasher:
+    password_hasher = request.app.state.password_hasher
+    if password_hasher is None:
+        message = "Password hasher not initialized"
+        logger.error(message)
+        raise RuntimeError(message)
+    return password_hasher
+
+
+PasswordHasherDep = Annotated[PasswordHasher, Depends(get_password_hasher)]
+
+
+async def get_token_cache(request: Request) -> LocalCache:
+    token_cache = request.app.state.token_cache
+    if token_cache is None:
+        message = "Token cache not initialized"
+        logger.error(message)
+        raise RuntimeError(message)
+    return token_cache
+
+
+TokenCacheDep = Annotated[LocalCache, Depends(get_token_cache)]
+
+
 async def get_security_service(
     token_bl: TokenBLServiceDep,
     settings: SettingsDep,
+    hasher: PasswordHasherDep,
+    token_cache: TokenCacheDep,
 ) -> SecurityService:
-    return SecurityService(token_bl=token_bl, settings=settings)
+    return SecurityService(
+        token_bl=token_bl, settings=settings, hasher=hasher, token_cache=token_cache
+    )
 
 
 SecurityServiceDep = Annotated[SecurityService, Depends(get_security_service)]
 
 
+async def get_login_throttle_service(
+    redis_cache: RedisCacheDep, settings: SettingsDep
+) -> LoginThrottleService:
+    return LoginThrottleService(redis=redis_cache, settings=settings)
+
+
+LoginThrottleDep = Annotated[LoginThrottleService, Depends(get_login_throttle_service)]
+
+
+async def get_user_cache_service(
+    redis_cache: RedisCacheDep, settings: SettingsDep
+) -> UserCacheService:
+    return UserCacheService(redis=redis_cache, settings=settings)
+
+
+UserCacheDep = Annotated[UserCacheService, Depends(get_user_cache_service)]
+
+
 # main auth dependencies
 async def get_auth_service(
-    session: SessionDep, security: SecurityServiceDep, token_bl: TokenBLServiceDep
+    session: SessionDep,
+    security: SecurityServiceDep,
+    token_bl: TokenBLServiceDep,
+    throttle: LoginThrottleDep,
+    user_cache: UserCacheDep,
 ) -> AuthService:
     return AuthService(
         session=session,
         user_repo=UserRepository(session=session),
         token_bl=token_bl,
         security=security,
+        throttle=throttle,
+        user_cache=user_cache,
     )
 
 
 AuthServiceDep = Annotated[AuthService, Depends(get_auth_service)]
 
 
-async def get_user_service(
-    session: SessionDep,
-    security: SecurityServiceDep,
-    token_bl: TokenBLServiceDep,
-    mail_client: MailClientDep,
-) -> UserService:
-    return UserService(
-        session=session,
-        user_repo=UserRepository(session=session),
-        token_bl=token_bl,
-        security=security,
-        mail_client=mail_client,
-    )
+def user_service_factory(session_dep: Any) -> Callable[..., Awaitable[UserService]]:
+    async def get_user_service(
+        session: session_dep,
+        security: SecurityServiceDep,
+        token_bl: TokenBLServiceDep,
+        mail_client: MailClientDep,
+        user_cache: UserCacheDep,
+    ) -> UserService:
+        return UserService(
+            session=session,
+            user_repo=UserRepository(session=session),
+            token_bl=token_bl,
+            security=security,
+            mail_client=mail_client,
+            user_cache=user_cache,
+        )
+
+    return get_user_service
 
 
-UserServiceDep = Annotated[UserService, Depends(get_user_service)]
+UserServiceDep = Annotated[UserService, Depends(user_service_factory(SessionDep))]
+UserReadServiceDep = Annotated[UserService, Depends(user_service_factory(ReadSessionDep))]
 
 
 # clients dependencies
@@ -155,10 +241,18 @@ async def get_current_user(
     security: SecurityServiceDep,
 ) -> UserPayload:
     try:
-        payload: AccessTokenPayload = await security.decode_validate_token(
-            credentials.credentials, TokenType.access
+        payload: (
+            AccessTokenPayload | CompactAccessTokenPayload
+        ) = await security.decode_validate_token(credentials.credentials, TokenType.access)
+        # the payload was validated when the token was decoded, it is not parsed again
+        return UserPayload.model_construct(
+            id=int(payload.sub),
+            username=payload.username,
+            email=payload.email,
+            is_admin=payload.is_admin,
+            jti=payload.jti,
+            iat=payload.iat,
         )
-        return UserPayload(id=int(payload.sub), **payload.model_dump())
     except TokenError:
         raise AuthorizationError
 
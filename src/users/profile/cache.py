@@ -0,0 +1,58 @@
+from dataclasses import dataclass
+
+from src.core import RedisServiceBase
+from src.core.cache import get_or_create_version, new_version
+from src.users.auth.schemas import UserPayload
+
+# stores the snapshot only while the user's version is still ARGV[1], the one read before
+# the user was loaded; a fill that read the row before a profile change is dropped
+SET_USER_SCRIPT = """
+if redis.call('GET', KEYS[2]) ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', ARGV[3])
+return 1
+"""
+
+
+@dataclass
+class UserCacheService(RedisServiceBase):
+    # what token issuing needs to know about a user; dropped on every profile change
+    # and kept short-lived, so a missed drop heals quickly
+    key_prefix: str = "users:snapshot"
+    version_key_prefix: str = "users:snapshot:version"
+
+    async def get_user(self, user_id: int) -> UserPayload | None:
+        if user_json := await self.redis.get(self._key(user_id)):
+            return UserPayload.model_validate_json(user_json)
+        return None
+
+    async def get_version(self, user_id: int) -> str:
+        # only has to outlive a read of the user, an expired version just skips one fill
+        return await get_or_create_version(
+            self.redis, self._version_key(user_id), ex=self.settings.USER_SNAPSHOT_SECONDS
+        )
+
+    async def set_user(self, user: UserPayload, version: str, ex: int | None = None) -> None:
+        if ex is None:
+            ex = self.settings.USER_SNAPSHOT_SECONDS
+
+        set_user = self.redis.register_script(SET_USER_SCRIPT)
+        await set_user(
+            keys=[self._key(user.id), self._version_key(user.id)],
+            args=[version, user.model_dump_json(exclude={"jti", "iat"}), ex],
+        )
+
+    async def delete_user(self, user_id: int) -> None:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.delete(self._key(user_id))
+            pipe.set(
+                self._version_key(user_id), new_version(), ex=self.settings.USER_SNAPSHOT_SECONDS
+            )
+            await pipe.execute()
+
+    def _key(self, user_id: int) -> str:
+        return f"{self.key_prefix}:{user_id}"
+
+    def _version_key(self, user_id: int) -> str:
+        return f"{self.version_key_prefix}:{user_id}"
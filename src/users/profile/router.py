@@ -1,7 +1,7 @@
 from fastapi import APIRouter
 from starlette import status
 
-from src.users.dependencies import CurrentUserDep, UserServiceDep
+from src.users.dependencies import CurrentUserDep, UserReadServiceDep, UserServiceDep
 from src.users.profile.schemas import (
     PasswordUpdate,
     PasswordUpdateResponse,
@@ -16,7 +16,7 @@ router = APIRouter(prefix="/users", tags=["users"])
 
 
 @router.get("/profile", response_model=UserDb)
-async def get_current_user(service: UserServiceDep, current_user: CurrentUserDep) -> UserDb:
+async def get_current_user(service: UserReadServiceDep, current_user: CurrentUserDep) -> UserDb:
     return await service.get_current_user(current_user)
 
 
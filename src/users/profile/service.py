@@ -13,6 +13,7 @@ from src.users.auth.schemas import (
     YandexUserData,
 )
 from src.users.auth.services.security import SecurityService, TokenBlacklistService
+from src.users.profile.cache import UserCacheService
 from src.users.profile.clients import MailClient
 from src.users.profile.exceptions import (
     EmailAlreadyExists,
@@ -30,6 +31,11 @@ from src.users.profile.schemas import (
     UserDelete,
 )
 
+USER_UNIQUE_ERRORS = {
+    "ix_users_username": UsernameAlreadyExists,
+    "users_email_key": EmailAlreadyExists,
+}
+
 
 @dataclass
 class UserService(SessionServiceBase):
@@ -37,6 +43,7 @@ class UserService(SessionServiceBase):
     token_bl: TokenBlacklistService
     security: SecurityService
     mail_client: MailClient
+    user_cache: UserCacheService
 
     async def get_current_user(self, current_user: UserPayload) -> UserDb:
         user = await self.user_repo.get_by_id_or_404(current_user.id)
@@ -44,15 +51,13 @@ class UserService(SessionServiceBase):
         return UserDb.model_validate(user)
 
     async def create_user(self, body: UserCreate) -> UserDb:
-        await self._validate_username_email(body.username, str(body.email))
-
         user_to_db = UserToDb(
-            hashed_password=self.security.hash_password(body.password),
+            hashed_password=await self.security.hash_password(body.password),
             **body.model_dump(),
         )
         user = await self.user_repo.add(User(**user_to_db.model_dump()))
 
-        await self.commit()
+        await self.commit(USER_UNIQUE_ERRORS)
 
         logger.info("User created: username=%s, email=%s", user.username, user.email)
 
@@ -61,16 +66,14 @@ class UserService(SessionServiceBase):
         return UserDb.model_validate(user)
 
     async def create_superuser(self, body: UserCreate) -> UserDb:
-        await self._validate_username_email(body.username, str(body.email))
-
         user_to_db = UserToDb(
-            hashed_password=self.security.hash_password(body.password),
+            hashed_password=await self.security.hash_password(body.password),
             is_admin=True,
             **body.model_dump(),
         )
         user = await self.user_repo.add(User(**user_to_db.model_dump()))
 
-        await self.commit()
+        await self.commit(USER_UNIQUE_ERRORS)
 
         logger.info("Superuser created: username=%s, email=%s", user.username, user.email)
 
@@ -81,17 +84,12 @@ class UserService(SessionServiceBase):
     async def update_user(self, user_id: int, body: UserUpdate) -> UserDb:
         user = await self.user_repo.get_by_id_or_404(user_id)
 
-        if body.username:
-            await self._validate_username(body.username)
-
-        if body.email:
-            await self._validate_email(str(body.email))
-
         for key, value in body.model_dump().items():
             if value:
                 setattr(user, key, value)
 
-        await self.commit()
+        await self.commit(USER_UNIQUE_ERRORS)
+        await self.user_cache.delete_user(user.id)
 
         logger.info("User updated: username=%s", user.username)
 
@@ -99,14 +97,15 @@ class UserService(SessionServiceBase):
 
     async def change_password(self, body: PasswordUpdate, current_user: UserPayload) -> None:
         user = await self.user_repo.get_by_id_or_404(current_user.id)
-        if not self.security.verify_password(body.old_password, user.hashed_password):
+        if not await self.security.verify_password(body.old_password, user.hashed_password):
             logger.info(
                 "Password change failed: username=%s, reason=Invalid old password", user.username
             )
             raise InvalidPassword
-        user.hashed_password = self.security.hash_password(body.new_password)
+        user.hashed_password = await self.security.hash_password(body.new_password)
 
         await self.commit()
+        await self.user_cache.delete_user(user.id)
 
         logger.info("Password changed: username=%s", user.username)
 
@@ -116,12 +115,13 @@ class UserService(SessionServiceBase):
     async def delete_user(self, body: UserDelete, current_user: UserPayload) -> None:
         user = await self.user_repo.get_by_id_or_404(current_user.id)
 
-        if not self.security.verify_password(body.password, user.hashed_password):
+        if not await self.security.verify_password(body.password, user.hashed_password):
             logger.info("User delete failure: username=%s, reason: Invalid password", user.username)
             raise InvalidPassword
 
         await self.user_repo.delete(user)
         await self.commit()
+        await self.user_cache.delete_user(user.id)
 
         logger.info("User deleted: username=%s", current_user.username)
 
@@ -146,7 +146,7 @@ class UserService(SessionServiceBase):
             raise ProviderError
 
         user = await self.user_repo.add(User(**user_to_db.model_dump()))
-        await self.commit()
+        await self.commit(USER_UNIQUE_ERRORS)
 
         logger.info(
             "Created new user from OAuth: username=%s, provider=%s", user.username, provider.value
@@ -165,7 +165,7 @@ class UserService(SessionServiceBase):
 
         return UserToDb(
             username=username,
-            hashed_password=self.security.hash_password(password),
+            hashed_password=await self.security.hash_password(password),
             email=user_data.email,
             full_name=user_data.name,
         )
@@ -179,7 +179,7 @@ class UserService(SessionServiceBase):
 
         return UserToDb(
             username=username,
-            hashed_password=self.security.hash_password(password),
+            hashed_password=await self.security.hash_password(password),
             email=user_data.email,
             full_name=user_data.real_name,
             age=self._calculate_age_from_birthday(user_data.birthday),
@@ -189,14 +189,6 @@ class UserService(SessionServiceBase):
         if await self.user_repo.get_by_username(username):
             raise UsernameAlreadyExists
 
-    async def _validate_email(self, email: str) -> None:
-        if await self.user_repo.get_by_email(email):
-            raise EmailAlreadyExists
-
-    async def _validate_username_email(self, username: str, email: str) -> None:
-        await self._validate_username(username)
-        await self._validate_email(email)
-
     @staticmethod
     def _calculate_age_from_birthday(birthday: str) -> int:
         birthdate = datetime.datetime.strptime(birthday, "%Y-%m-%d").date()
@@ -7,15 +7,24 @@ from sqlalchemy import NullPool
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 
 from src.core import Base
+from src.core.cache import LocalCache
 from src.core.config import get_auth_settings, get_settings
 from src.core.dependencies import (
     get_async_session,
+    get_session_maker,
+    get_read_session,
+    get_replica_set,
     get_redis_blacklist,
     get_redis_cache,
     get_broker_client,
+    get_local_cache,
 )
+from src.core.replicas import ReplicaSet
 from src.main import app
 from src.tasks.models import Category, Task
+from src.users.auth.hashing import PasswordHasher
+from src.users.auth.revocation import RevocationIndex
+from src.users.dependencies import get_password_hasher, get_revocation_index, get_token_cache
 from src.users.profile.models import User
 from tests.fixtures.broker import fake_broker_client
 
@@ -78,6 +87,18 @@ async def get_async_session_test() -> AsyncGenerator[AsyncSession, None]:
         yield test_session
 
 
+async def get_session_maker_test() -> async_sessionmaker[AsyncSession]:
+    return test_async_session_maker
+
+
+# no replicas in tests, every read goes to the primary
+REPLICAS = ReplicaSet(engines=[], max_lag=test_settings.DB_REPLICA_MAX_LAG_SECONDS)
+
+
+async def get_replica_set_test() -> ReplicaSet:
+    return REPLICAS
+
+
 @pytest.fixture
 async def session():
     async with test_async_session_maker() as test_session:
@@ -156,6 +177,109 @@ def redis_bl():
     return REDIS_BLACKLIST
 
 
+# test local cache setup
+LOCAL_CACHE: LocalCache | None = None
+
+
+@pytest.fixture(autouse=True)
+def prepare_local_cache():
+    global LOCAL_CACHE
+
+    LOCAL_CACHE = LocalCache(
+        maxsize=test_settings.LOCAL_CACHE_MAX_ITEMS, ttl=test_settings.LOCAL_CACHE_SECONDS
+    )
+
+    yield
+
+    LOCAL_CACHE.invalidate()
+
+
+async def get_local_cache_test() -> LocalCache:
+    if LOCAL_CACHE is None:
+        raise RuntimeError("Test local cache not initialized")
+    return LOCAL_CACHE
+
+
+@pytest.fixture
+def local_cache():
+    return LOCAL_CACHE
+
+
+# test verified token cache setup
+TOKEN_CACHE: LocalCache | None = None
+
+
+@pytest.fixture(autouse=True)
+def prepare_token_cache():
+    global TOKEN_CACHE
+
+    TOKEN_CACHE = LocalCache(
+        maxsize=test_settings.TOKEN_CACHE_MAX_ITEMS,
+        ttl=test_settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60,
+    )
+
+    yield
+
+    TOKEN_CACHE.invalidate()
+
+
+async def get_token_cache_test() -> LocalCache:
+    if TOKEN_CACHE is None:
+        raise RuntimeError("Test token cache not initialized")
+    return TOKEN_CACHE
+
+
+@pytest.fixture
+def token_cache():
+    return TOKEN_CACHE
+
+
+# test revocation index setup
+REVOCATION_INDEX: RevocationIndex | None = None
+
+
+@pytest.fixture(autouse=True)
+async def prepare_revocation_index(prepare_redis):
+    global REVOCATION_INDEX
+
+    # no listener in tests: the index is synced once and fed by this process' own writes
+    REVOCATION_INDEX = RevocationIndex(
+        logout_ts=LocalCache(
+            maxsize=test_settings.LOGOUT_TS_CACHE_MAX_ITEMS,
+            ttl=test_settings.LOGOUT_TS_CACHE_SECONDS,
+        )
+    )
+    await REVOCATION_INDEX.sync(REDIS_BLACKLIST)
+
+
+async def get_revocation_index_test() -> RevocationIndex:
+    if REVOCATION_INDEX is None:
+        raise RuntimeError("Test revocation index not initialized")
+    return REVOCATION_INDEX
+
+
+@pytest.fixture
+def revocation_index():
+    return REVOCATION_INDEX
+
+
+# test password hasher setup, one pool for the whole session
+PASSWORD_HASHER = PasswordHasher(
+    pwd_context=test_settings.PWD_CONTEXT,
+    workers=test_settings.PASSWORD_HASH_WORKERS,
+    queue_size=test_settings.PASSWORD_HASH_QUEUE_SIZE,
+)
+
+
+async def get_password_hasher_test() -> PasswordHasher:
+    return PASSWORD_HASHER
+
+
+@pytest.fixture
+def password_hasher():
+    return PASSWORD_HASHER
+
+
 # broker setup
 # BROKER_CLIENT: BrokerClient | None = None
 #
@@ -187,6 +311,15 @@ def redis_bl():
 @pytest.fixture(autouse=True, scope="session")
 def override_dependencies():
     app.dependency_overrides[get_async_session] = get_async_session_test
+    app.dependency_overrides[get_session_maker] = get_session_maker_test
+    app.dependency_overrides[get_read_session] = get_async_session_test
+    app.dependency_overrides[get_replica_set] = get_replica_set_test
     app.dependency_overrides[get_redis_cache] = get_redis_cache_test
     app.dependency_overrides[get_redis_blacklist] = get_redis_blacklist_test
     app.dependency_overrides[get_broker_client] = fake_broker_client
+    app.dependency_overrides[get_local_cache] = get_local_cache_test
+    app.dependency_overrides[get_revocation_index] = get_revocation_index_test
+    app.dependency_overrides[get_password_hasher] = get_password_hasher_test
+    app.dependency_overrides[get_token_cache] = get_token_cache_test
+    # read by the read-your-writes middleware, which dependency overrides do not reach
+    app.state.replicas = REPLICAS
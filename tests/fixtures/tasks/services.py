@@ -9,5 +9,5 @@ def task_cache(redis_cache, settings):
 
 
 @pytest.fixture
-def category_cache(redis_cache, settings):
-    return CategoryCacheService(redis=redis_cache, settings=settings)
+def category_cache(redis_cache, local_cache, settings):
+    return CategoryCacheService(redis=redis_cache, settings=settings, local_cache=local_cache)
@@ -16,6 +16,9 @@ class FakeTokenBlacklistService:
     async def get_logout_timestamp(self, *args, **kwargs) -> int | None:
         pass
 
+    async def is_revoked(self, *args, **kwargs) -> bool:
+        return False
+
 
 @pytest.fixture()
 def fake_blacklist_service():
@@ -23,5 +26,12 @@ def fake_blacklist_service():
 
 
 @pytest.fixture()
-def test_security_service(fake_blacklist_service: TokenBlacklistService, settings):
-    return SecurityService(token_bl=fake_blacklist_service, settings=settings)
+def test_security_service(
+    fake_blacklist_service: TokenBlacklistService, password_hasher, token_cache, settings
+):
+    return SecurityService(
+        token_bl=fake_blacklist_service,
+        settings=settings,
+        hasher=password_hasher,
+        token_cache=token_cache,
+    )
@@ -0,0 +1,20 @@
+from httpx import AsyncClient
+from starlette import status
+
+
+class TestMetrics:
+    async def test_password_hashing(self, ac: AsyncClient, bearer, admin_bearer):
+        response = await ac.get("/api/metrics/password-hashing", headers=bearer)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        response = await ac.get("/api/metrics/password-hashing", headers=admin_bearer)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["component"] == "password hashing"
+
+    async def test_database(self, ac: AsyncClient, bearer, admin_bearer):
+        response = await ac.get("/api/metrics/database", headers=bearer)
+        assert response.status_code == status.HTTP_403_FORBIDDEN
+
+        response = await ac.get("/api/metrics/database", headers=admin_bearer)
+        assert response.status_code == status.HTTP_200_OK
+        assert response.json()["component"] == "database"
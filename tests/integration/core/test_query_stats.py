@@ -0,0 +1,19 @@
+from fastapi import status
+from httpx import AsyncClient
+
+
+class TestQueryStats:
+    async def test_header(self, ac: AsyncClient, test_task):
+        response = await ac.get(f"/api/tasks/{test_task.id}")
+        assert response.status_code == status.HTTP_200_OK
+
+        assert response.headers["X-Query-Count"] == "1"
+        assert float(response.headers["X-Query-Time-Ms"]) > 0
+
+    async def test_streamed_body(self, ac: AsyncClient, test_task, settings, monkeypatch, caplog):
+        # the export runs its queries while the body streams, after the headers went out
+        monkeypatch.setattr(settings, "QUERY_BUDGET", 0)
+
+        response = await ac.get("/api/tasks/export")
+        assert response.status_code == status.HTTP_200_OK
+        assert "Query budget exceeded: GET /api/tasks/export" in caplog.text
@@ -0,0 +1,61 @@
+from fastapi import status
+from httpx import AsyncClient
+from sqlalchemy.engine import make_url
+
+from src.core.database import database_engine_init
+from src.core.replicas import ReplicaSet
+from src.main import app
+
+
+class TestReplicaSet:
+    async def test_lag_check(self, settings):
+        # the test database is a primary, it reports no replay lag
+        replicas = ReplicaSet(
+            engines=[database_engine_init(settings.DATABASE_URL)],
+            max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+        )
+        try:
+            # no reads before the lag was measured once
+            assert replicas.pick() is None
+
+            await replicas.check_lag()
+            assert replicas.pick() is replicas.session_makers[0]
+            assert replicas.metrics()[0]["healthy"]
+        finally:
+            await replicas.dispose()
+
+    async def test_unreachable(self, settings):
+        url = make_url(settings.DATABASE_URL).set(port=1)
+        replicas = ReplicaSet(
+            engines=[database_engine_init(url.render_as_string(hide_password=False))],
+            max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+        )
+        try:
+            await replicas.check_lag()
+            assert replicas.pick() is None
+            assert not replicas.metrics()[0]["healthy"]
+        finally:
+            await replicas.dispose()
+
+
+class TestReadYourWrites:
+    async def test_pin_after_write(
+        self, ac: AsyncClient, bearer, settings, redis_cache, monkeypatch
+    ):
+        replicas = ReplicaSet(
+            engines=[database_engine_init(settings.DATABASE_URL)],
+            max_lag=settings.DB_REPLICA_MAX_LAG_SECONDS,
+        )
+        monkeypatch.setattr(app.state, "replicas", replicas)
+        monkeypatch.setattr(app.state, "redis_cache", redis_cache, raising=False)
+
+        try:
+            response = await ac.get("/api/users/profile", headers=bearer)
+            assert response.status_code == status.HTTP_200_OK
+            assert not [key async for key in redis_cache.scan_iter(match="db:primary:*")]
+
+            response = await ac.post("/api/auth/logout", headers=bearer)
+            assert response.status_code == status.HTTP_200_OK
+            assert [key async for key in redis_cache.scan_iter(match="db:primary:*")]
+        finally:
+            await replicas.dispose()
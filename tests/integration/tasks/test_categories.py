@@ -1,6 +1,9 @@
+import asyncio
+
 from httpx import AsyncClient
 from starlette import status
 
+from src.core import PageParams, RenderedPage
 from src.tasks.models import Category
 from src.tasks.schemas import CategoryCreate, CategoryDb
 
@@ -32,6 +35,94 @@ class TestGetAll:
         assert third_response.status_code == status.HTTP_200_OK
         assert len(third_response.json()) == 2
 
+    async def test_local_cache(
+        self, ac: AsyncClient, category_create, category_cache, local_cache, redis_cache
+    ):
+        response = await ac.get("/api/categories/")
+        assert response.status_code == status.HTTP_200_OK
+        # the page and the version token behind its ETag
+        assert len(local_cache) == 2
+
+        # an L1 hit is served without touching redis
+        await redis_cache.delete(category_cache.pages_key)
+        second_response = await ac.get("/api/categories/")
+        assert second_response.json() == response.json()
+
+        await category_cache.delete_all_categories()
+        assert len(local_cache) == 0
+
+    async def test_stale_while_revalidate(
+        self,
+        ac: AsyncClient,
+        category_repository,
+        category_cache,
+        local_cache,
+        redis_cache,
+        settings,
+    ):
+        response = await ac.get("/api/categories/")
+        assert len(response.json()) == 1
+
+        await category_repository.add(Category(name="unseen category"))
+        await category_repository.session.commit()
+        # move the cached page into its stale window and drop its fresh L1 copy
+        field = category_cache._page_field(PageParams())
+        await redis_cache.hexpire(category_cache.pages_key, settings.CACHE_STALE_SECONDS, field)
+        local_cache.invalidate()
+
+        stale_response = await ac.get("/api/categories/")
+        assert stale_response.status_code == status.HTTP_200_OK
+        assert stale_response.content == response.content
+
+        for _ in range(100):
+            (ttl,) = await redis_cache.httl(category_cache.pages_key, field)
+            if ttl > settings.CACHE_STALE_SECONDS:
+                break
+            await asyncio.sleep(0.05)
+
+        refreshed_response = await ac.get("/api/categories/")
+        assert len(refreshed_response.json()) == 2
+
+    async def test_page_skipped_after_write(self, category_cache, local_cache):
+        params = PageParams()
+        version = await category_cache.get_version()
+        stale_page = RenderedPage(content="[]")
+
+        await category_cache.delete_all_categories()
+        await category_cache.set_page(params, stale_page, version)
+
+        assert await category_cache.get_page(params, version) is None
+        assert await category_cache.get_page(params, await category_cache.get_version()) is None
+        assert len(local_cache) == 1
+
+    async def test_etag(self, ac: AsyncClient, category_create, admin_bearer):
+        response = await ac.get("/api/categories/")
+        etag = response.headers["ETag"]
+
+        not_modified = await ac.get("/api/categories/", headers={"If-None-Match": f"W/{etag}"})
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+
+        await ac.post("/api/categories/", json=category_create.model_dump(), headers=admin_bearer)
+
+        modified = await ac.get("/api/categories/", headers={"If-None-Match": etag})
+        assert modified.status_code == status.HTTP_200_OK
+        assert len(modified.json()) == 2
+
+    async def test_pagination(self, ac: AsyncClient, test_category, category_repository):
+        await category_repository.add(Category(name="second category"))
+        await category_repository.session.commit()
+
+        response = await ac.get("/api/categories/", params={"limit": 1})
+        assert response.status_code == status.HTTP_200_OK
+        assert [category["id"] for category in response.json()] == [test_category.id]
+
+        cursor = response.headers["X-Next-Cursor"]
+        second_response = await ac.get("/api/categories/", params={"limit": 1, "after": cursor})
+        assert second_response.status_code == status.HTTP_200_OK
+        assert len(second_response.json()) == 1
+        assert second_response.json()[0]["name"] == "second category"
+        assert "X-Next-Cursor" not in second_response.headers
+
 
 class TestCreate:
     async def test_success(
@@ -1,8 +1,13 @@
+import asyncio
+import json
+
 from httpx import AsyncClient
 from starlette import status
 
+from src.core import PageParams, RenderedPage
 from src.tasks.models import Category, Task
-from src.tasks.schemas import TaskCreate, TaskDb
+from src.tasks.schemas import TaskCreate, TaskDb, TaskWithCategory
+from src.tasks.services import TaskService
 
 
 class TestGetAll:
@@ -19,9 +24,11 @@ class TestGetAll:
         test_user,
         task_repository,
         task_cache,
+        redis_cache,
     ):
         response = await ac.get("/api/tasks/")
         assert response.status_code == 200
+        assert await task_cache.wait_ready()
 
         random_task = Task(creator_id=test_user.id, **task_create.model_dump())
         await task_repository.add(random_task)
@@ -31,12 +38,205 @@ class TestGetAll:
         assert second_response.status_code == 200
         assert len(second_response.json()) == 1
 
-        await task_cache.delete_all_tasks()
+        # drop the index so the next read misses the cache
+        await redis_cache.delete(task_cache.ready_key, task_cache.index_key, task_cache.items_key)
 
         third_response = await ac.get("/api/tasks/")
         assert third_response.status_code == 200
         assert len(third_response.json()) == 2
 
+    async def test_cache_patched_on_write(
+        self, ac: AsyncClient, task_create, test_task, task_cache, bearer
+    ):
+        response = await ac.get("/api/tasks/")
+        assert response.status_code == 200
+        assert await task_cache.wait_ready()
+        version = await task_cache.get_version()
+
+        create_response = await ac.post(
+            "/api/tasks/", json=task_create.model_dump(), headers=bearer
+        )
+        assert create_response.status_code == status.HTTP_201_CREATED
+        new_task = TaskDb(**create_response.json())
+        assert await task_cache.get_version() != version
+
+        # the write indexed the task and left its entry to the next read
+        assert await task_cache.get_page(PageParams(limit=10)) is None
+        await ac.get("/api/tasks/")
+
+        cached_page = await task_cache.get_page(PageParams(limit=10))
+        assert cached_page is not None
+        assert [task["id"] for task in json.loads(cached_page.content)] == [
+            test_task.id,
+            new_task.id,
+        ]
+
+        delete_response = await ac.delete(f"/api/tasks/{test_task.id}", headers=bearer)
+        assert delete_response.status_code == status.HTTP_200_OK
+
+        cached_page = await task_cache.get_page(PageParams(limit=10))
+        assert [task["id"] for task in json.loads(cached_page.content)] == [new_task.id]
+
+    async def test_cache_rebuild_skipped_after_write(self, test_task, task_cache):
+        async def chunks():
+            yield [test_task]
+
+        version = await task_cache.get_version()
+        await task_cache.set_task(test_task)
+
+        assert not await task_cache.rebuild(chunks(), version)
+        assert await task_cache.get_page(PageParams(limit=10)) is None
+
+    async def test_cache_hit_is_raw_body(self, ac: AsyncClient, test_task, task_cache):
+        response = await ac.get("/api/tasks/")
+        assert response.status_code == status.HTTP_200_OK
+        assert await task_cache.wait_ready()
+
+        cached_response = await ac.get("/api/tasks/")
+        assert cached_response.status_code == status.HTTP_200_OK
+        assert cached_response.headers["content-type"] == "application/json"
+        assert cached_response.content == f"[{test_task.model_dump_json()}]".encode()
+        assert cached_response.json() == response.json()
+
+    async def test_concurrent_misses_rebuild_once(self, ac: AsyncClient, task_cache):
+        responses = await asyncio.gather(*(ac.get("/api/tasks/") for _ in range(10)))
+
+        assert all(response.status_code == status.HTTP_200_OK for response in responses)
+        assert all(len(response.json()) == 1 for response in responses)
+        assert await task_cache.wait_ready()
+        assert await task_cache.get_page(PageParams(limit=10)) is not None
+
+    async def test_fill_skipped_after_write(self, ac: AsyncClient, test_task, task_cache):
+        await ac.get("/api/tasks/")
+        assert await task_cache.wait_ready()
+
+        version = await task_cache.get_version()
+        stale_task = test_task.model_copy(update={"name": "stale name"})
+        await task_cache.set_task(test_task)
+
+        assert await task_cache.fill_tasks([stale_task], version)
+        assert await task_cache.get_page(PageParams(limit=10)) is None
+
+    async def test_missing_entry_is_a_miss(
+        self, ac: AsyncClient, test_task, task_cache, redis_cache
+    ):
+        await ac.get("/api/tasks/")
+        assert await task_cache.wait_ready()
+
+        await redis_cache.hdel(task_cache.items_key, str(test_task.id))
+        assert await task_cache.get_page(PageParams(limit=10)) is None
+
+        response = await ac.get("/api/tasks/")
+        assert [task["id"] for task in response.json()] == [test_task.id]
+
+    async def test_rebuild_locked_by_other_worker(
+        self, ac: AsyncClient, test_task, task_cache, redis_cache, settings
+    ):
+        await redis_cache.set(task_cache.lock_key, "other worker", ex=settings.CACHE_LOCK_SECONDS)
+
+        response = await ac.get("/api/tasks/")
+        assert response.status_code == status.HTTP_200_OK
+        assert [task["id"] for task in response.json()] == [test_task.id]
+        assert await task_cache.get_page(PageParams(limit=10)) is None
+
+    async def test_stale_while_revalidate(
+        self, ac: AsyncClient, test_user, task_repository, task_cache, redis_cache, settings
+    ):
+        response = await ac.get("/api/tasks/")
+        assert len(response.json()) == 1
+        assert await task_cache.wait_ready()
+
+        await task_repository.add(Task(name="unseen task", creator_id=test_user.id))
+        await task_repository.session.commit()
+        # move the cached index into its stale window
+        await redis_cache.expire(task_cache.ready_key, settings.CACHE_STALE_SECONDS)
+
+        stale_response = await ac.get("/api/tasks/")
+        assert stale_response.status_code == status.HTTP_200_OK
+        assert stale_response.content == response.content
+
+        for _ in range(100):
+            if await redis_cache.ttl(task_cache.ready_key) > settings.CACHE_STALE_SECONDS:
+                break
+            await asyncio.sleep(0.05)
+
+        refreshed_response = await ac.get("/api/tasks/")
+        assert len(refreshed_response.json()) == 2
+
+    async def test_etag(self, ac: AsyncClient, task_create, bearer):
+        response = await ac.get("/api/tasks/")
+        assert response.status_code == status.HTTP_200_OK
+        etag = response.headers["ETag"]
+
+        not_modified = await ac.get("/api/tasks/", headers={"If-None-Match": etag})
+        assert not_modified.status_code == status.HTTP_304_NOT_MODIFIED
+        assert not_modified.headers["ETag"] == etag
+        assert not_modified.content == b""
+
+        other_page = await ac.get("/api/tasks/", params={"limit": 1})
+        assert other_page.headers["ETag"] != etag
+
+        await ac.post("/api/tasks/", json=task_create.model_dump(), headers=bearer)
+
+        modified = await ac.get("/api/tasks/", headers={"If-None-Match": etag})
+        assert modified.status_code == status.HTTP_200_OK
+        assert modified.headers["ETag"] != etag
+        assert len(modified.json()) == 2
+
+    async def test_pagination(self, ac: AsyncClient, test_user, test_task, task_repository):
+        for i in range(4):
+            await task_repository.add(Task(name=f"paginated task {i}", creator_id=test_user.id))
+        await task_repository.session.commit()
+
+        task_ids = []
+        params = {"limit": 2}
+        while True:
+            response = await ac.get("/api/tasks/", params=params)
+            assert response.status_code == status.HTTP_200_OK
+            assert len(response.json()) <= 2
+            task_ids.extend(task["id"] for task in response.json())
+
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["after"] = response.headers["X-Next-Cursor"]
+
+        assert len(task_ids) == 5
+        assert task_ids == sorted(task_ids)
+        assert task_ids[0] == test_task.id
+
+    async def test_expand_category(
+        self, ac: AsyncClient, test_user, test_task, test_category, task_repository
+    ):
+        for i in range(4):
+            await task_repository.add(
+                Task(
+                    name=f"expanded task {i}",
+                    category_id=test_category.id if i % 2 else None,
+                    creator_id=test_user.id,
+                )
+            )
+        await task_repository.session.commit()
+
+        response = await ac.get("/api/tasks/", params={"expand": "category"})
+        assert response.status_code == status.HTTP_200_OK
+        assert "ETag" not in response.headers
+
+        tasks = [TaskWithCategory(**task) for task in response.json()]
+        assert len(tasks) == 5
+        for task in tasks:
+            if task.category_id is None:
+                assert task.category is None
+            else:
+                assert task.category == test_category
+
+        # one query for the tasks and one for all their categories, however many rows
+        assert response.headers["X-Query-Count"] == "2"
+
+    async def test_invalid_cursor(self, ac: AsyncClient):
+        response = await ac.get("/api/tasks/", params={"after": "not-a-cursor"})
+        assert response.status_code == status.HTTP_400_BAD_REQUEST
+        assert response.json()["detail"] == "Invalid pagination cursor"
+
 
 class TestCreate:
     async def test_success(self, ac: AsyncClient, task_create, task_repository, bearer):
@@ -60,6 +260,114 @@ class TestCreate:
         assert response.json()["detail"] == "Task with this name already exists"
 
 
+class TestBulk:
+    async def test_create(
+        self, ac: AsyncClient, test_task, category_random: Category, task_repository, bearer
+    ):
+        new_tasks = [
+            {"name": "bulk task 1", "category_id": test_task.category_id},
+            {"name": "bulk task 2", "pomodoro_count": 3},
+            {"name": test_task.name},
+            {"name": "bulk task 1"},
+            {"name": "bulk task 3", "category_id": category_random.id},
+        ]
+        response = await ac.post("/api/tasks/bulk", json={"tasks": new_tasks}, headers=bearer)
+        assert response.status_code == status.HTTP_200_OK
+
+        results = response.json()
+        assert [result["status_code"] for result in results] == [201, 201, 409, 409, 404]
+        assert results[2]["detail"] == "Task with this name already exists"
+        assert results[4]["detail"] == "There is no category with requested id"
+
+        for result in results[:2]:
+            task_from_db = await task_repository.get_by_id(result["id"])
+            assert task_from_db.name == result["task"]["name"]
+        assert results[1]["task"]["pomodoro_count"] == 3
+
+        list_response = await ac.get("/api/tasks/")
+        assert len(list_response.json()) == 3
+
+    async def test_create_name_taken_after_lookup(
+        self, ac: AsyncClient, test_task, bearer, monkeypatch
+    ):
+        async def no_taken_names(self, names):
+            return {}
+
+        # the lookup misses a name that a concurrent request inserts right after it
+        monkeypatch.setattr(TaskService, "_get_taken_names", no_taken_names)
+
+        new_tasks = [{"name": test_task.name}, {"name": "bulk task 1"}]
+        response = await ac.post("/api/tasks/bulk", json={"tasks": new_tasks}, headers=bearer)
+        assert response.status_code == status.HTTP_200_OK
+
+        results = response.json()
+        assert [result["status_code"] for result in results] == [409, 201]
+        assert results[0]["detail"] == "Task with this name already exists"
+
+    async def test_update(
+        self, ac: AsyncClient, test_task, task_random: Task, task_repository, bearer
+    ):
+        await ac.get(f"/api/tasks/category/{test_task.category_id}")
+
+        patches = [
+            {"id": test_task.id, "name": "patched task", "category_id": None},
+            {"id": task_random.id, "name": "missing task"},
+            {"id": test_task.id, "pomodoro_count": 1},
+        ]
+        response = await ac.patch("/api/tasks/bulk", json={"tasks": patches}, headers=bearer)
+        assert response.status_code == status.HTTP_200_OK
+
+        results = response.json()
+        assert [result["status_code"] for result in results] == [200, 404, 409]
+
+        task_from_db = await task_repository.get_by_id(test_task.id)
+        assert task_from_db.name == "patched task"
+        assert task_from_db.pomodoro_count == test_task.pomodoro_count
+        assert task_from_db.category_id is None
+
+        category_response = await ac.get(f"/api/tasks/category/{test_task.category_id}")
+        assert category_response.json() == []
+
+    async def test_delete(
+        self, ac: AsyncClient, test_task, task_random: Task, task_repository, bearer
+    ):
+        response = await ac.request(
+            "DELETE",
+            "/api/tasks/bulk",
+            json={"ids": [test_task.id, task_random.id]},
+            headers=bearer,
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        results = response.json()
+        assert [result["status_code"] for result in results] == [200, 404]
+        assert results[0]["detail"] == "Task successfully deleted"
+        assert await task_repository.get_by_id(test_task.id) is None
+
+        list_response = await ac.get("/api/tasks/")
+        assert list_response.json() == []
+
+    async def test_empty(self, ac: AsyncClient, bearer):
+        response = await ac.post("/api/tasks/bulk", json={"tasks": []}, headers=bearer)
+        assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+
+
+class TestExport:
+    async def test_success(self, ac: AsyncClient, test_user, test_task, task_repository):
+        for i in range(3):
+            await task_repository.add(Task(name=f"exported task {i}", creator_id=test_user.id))
+        await task_repository.session.commit()
+
+        response = await ac.get("/api/tasks/export")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+
+        tasks = [TaskDb.model_validate_json(line) for line in response.text.splitlines()]
+        assert len(tasks) == 4
+        assert tasks[0] == test_task
+        assert [task.id for task in tasks] == sorted(task.id for task in tasks)
+
+
 class TestGetOne:
     async def test_success(self, ac: AsyncClient, test_task):
         response = await ac.get(f"/api/tasks/{test_task.id}")
@@ -72,6 +380,14 @@ class TestGetOne:
         assert task.category_id == test_task.category_id
         assert task.creator_id == test_task.creator_id
 
+    async def test_expand_category(self, ac: AsyncClient, test_task, test_category):
+        response = await ac.get(f"/api/tasks/{test_task.id}", params={"expand": "category"})
+        assert response.status_code == status.HTTP_200_OK
+
+        task = TaskWithCategory(**response.json())
+        assert task.id == test_task.id
+        assert task.category == test_category
+
     async def test_fail(self, ac: AsyncClient, task_random: Task):
         response = await ac.get(f"/api/tasks/{task_random.id}")
         assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -95,6 +411,17 @@ class TestUpdate:
         assert task.category_id == task_from_db.category_id == task_create.category_id
         assert task.creator_id == task_from_db.creator_id
 
+    async def test_name_taken(self, ac: AsyncClient, task_create, test_task, bearer):
+        response = await ac.post("/api/tasks/", json=task_create.model_dump(), headers=bearer)
+        task = TaskDb(**response.json())
+
+        task_create.name = test_task.name
+        response = await ac.put(
+            f"/api/tasks/{task.id}", json=task_create.model_dump(), headers=bearer
+        )
+        assert response.status_code == status.HTTP_409_CONFLICT
+        assert response.json()["detail"] == "Task with this name already exists"
+
     async def test_fail(self, ac: AsyncClient, test_task, task_random: Task, task_create, bearer):
         response = await ac.put(
             f"/api/tasks/{task_random.id}", json=task_create.model_dump(), headers=bearer
@@ -114,22 +441,70 @@ class TestDelete:
 
 
 class TestGetByCategory:
-    async def test_success(
-        self, ac: AsyncClient, test_category, test_user, task_create, task_repository
-    ):
+    async def test_success(self, ac: AsyncClient, test_category, test_task, task_create, bearer):
         response = await ac.get(f"/api/tasks/category/{test_category.id}")
         assert response.status_code == 200
         assert isinstance(response.json(), list)
         assert len(response.json()) == 1
 
-        await task_repository.add(Task(creator_id=test_user.id, **task_create.model_dump()))
-        await task_repository.session.commit()
+        create_response = await ac.post(
+            "/api/tasks/", json=task_create.model_dump(), headers=bearer
+        )
+        assert create_response.status_code == status.HTTP_201_CREATED
 
         second_response = await ac.get(f"/api/tasks/category/{test_category.id}")
         assert second_response.status_code == status.HTTP_200_OK
         assert isinstance(second_response.json(), list)
         assert len(second_response.json()) == 2
 
+    async def test_cache(
+        self, ac: AsyncClient, test_category, test_user, task_create, task_repository, task_cache
+    ):
+        response = await ac.get(f"/api/tasks/category/{test_category.id}")
+        assert response.status_code == status.HTTP_200_OK
+        assert await task_cache.get_category_tasks(test_category.id) is not None
+
+        await task_repository.add(Task(creator_id=test_user.id, **task_create.model_dump()))
+        await task_repository.session.commit()
+
+        cached_response = await ac.get(f"/api/tasks/category/{test_category.id}")
+        assert cached_response.content == response.content
+
+    async def test_stale_fill_after_delete(self, test_category, task_cache):
+        version = await task_cache.get_version()
+        await task_cache.delete_category_tasks(test_category.id)
+
+        # a loader that read the category before the delete finishes afterwards
+        await task_cache.set_category_tasks(
+            test_category.id, RenderedPage.from_json_items([]), version
+        )
+        assert await task_cache.get_category_tasks(test_category.id) is None
+
+    async def test_task_moved_out(self, ac: AsyncClient, test_category, test_task, bearer):
+        response = await ac.get(f"/api/tasks/category/{test_category.id}")
+        assert [task["id"] for task in response.json()] == [test_task.id]
+
+        update_response = await ac.put(
+            f"/api/tasks/{test_task.id}",
+            json=TaskCreate(name=test_task.name, category_id=None).model_dump(),
+            headers=bearer,
+        )
+        assert update_response.status_code == status.HTTP_200_OK
+
+        second_response = await ac.get(f"/api/tasks/category/{test_category.id}")
+        assert second_response.status_code == status.HTTP_200_OK
+        assert second_response.json() == []
+
+    async def test_expand_category(self, ac: AsyncClient, test_category, test_task):
+        response = await ac.get(
+            f"/api/tasks/category/{test_category.id}", params={"expand": "category"}
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+        tasks = [TaskWithCategory(**task) for task in response.json()]
+        assert [task.id for task in tasks] == [test_task.id]
+        assert tasks[0].category == test_category
+
     async def test_fail(self, ac: AsyncClient, category_random: Category):
         response = await ac.get(f"/api/tasks/category/{category_random.id}")
         assert response.status_code == status.HTTP_404_NOT_FOUND
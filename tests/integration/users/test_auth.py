@@ -1,6 +1,9 @@
+import datetime
+
 import jwt
 from fastapi import status
 from httpx import AsyncClient
+from passlib.context import CryptContext
 
 from src.core.config import Settings
 from src.users.auth.schemas import (
@@ -10,6 +13,8 @@ from src.users.auth.schemas import (
     Tokens,
     UserLogin,
 )
+from src.users.auth.services import TokenBlacklistService
+from src.users.profile.cache import UserCacheService
 
 
 class TestLogin:
@@ -57,6 +62,53 @@ class TestRefresh:
         assert tokens.access_token
         assert tokens.refresh_token
 
+    async def test_user_snapshot(
+        self, ac: AsyncClient, test_tokens, test_user, bearer, redis_cache
+    ):
+        key = f"users:snapshot:{test_user.id}"
+        body = RefreshToken(refresh_token=test_tokens.refresh_token)
+
+        response = await ac.post("/api/auth/refresh", json=body.model_dump())
+        assert response.status_code == status.HTTP_200_OK
+        assert await redis_cache.exists(key)
+
+        response = await ac.put(
+            "/api/users/update", json={"username": "snapshot_user"}, headers=bearer
+        )
+        assert response.status_code == status.HTTP_200_OK
+        assert not await redis_cache.exists(key)
+
+    async def test_user_snapshot_fill_skipped_after_change(
+        self, ac: AsyncClient, test_tokens, test_user, redis_cache, settings: Settings
+    ):
+        user_cache = UserCacheService(redis=redis_cache, settings=settings)
+        body = RefreshToken(refresh_token=test_tokens.refresh_token)
+        await ac.post("/api/auth/refresh", json=body.model_dump())
+        user = await user_cache.get_user(test_user.id)
+
+        # a refresh read the row, then a profile change dropped the snapshot
+        version = await user_cache.get_version(test_user.id)
+        await user_cache.delete_user(test_user.id)
+        await user_cache.set_user(user, version)
+
+        assert await user_cache.get_user(test_user.id) is None
+
+    async def test_rehash(self, ac: AsyncClient, settings: Settings, test_user, user_repository):
+        user = await user_repository.get_by_username(test_user.username)
+        old_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+        old_hashed_password = old_context.hash(test_user.password)
+        user.hashed_password = old_hashed_password
+        await user_repository.session.commit()
+
+        body = UserLogin(username=test_user.username, password=test_user.password)
+        response = await ac.post("/api/auth/token", json=body.model_dump())
+        assert response.status_code == status.HTTP_200_OK
+
+        await user_repository.session.refresh(user)
+        assert user.hashed_password != old_hashed_password
+        assert not settings.PWD_CONTEXT.needs_update(user.hashed_password)
+        assert settings.PWD_CONTEXT.verify(test_user.password, user.hashed_password)
+
     async def test_fail(self, ac: AsyncClient, settings: Settings, test_tokens):
         body = RefreshToken(refresh_token=test_tokens.refresh_token_exp)
 
@@ -66,6 +118,38 @@ class TestRefresh:
         assert response.json()["detail"] == "Token expired"
 
 
+class TestLoginThrottle:
+    async def test_username_limit(self, ac: AsyncClient, settings: Settings, test_user):
+        body = UserLogin(username=test_user.username, password="wrong_password")
+        for _ in range(settings.LOGIN_LIMIT_PER_USERNAME):
+            response = await ac.post("/api/auth/token", json=body.model_dump())
+            assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        # the right password is not even checked once the window is full
+        body = UserLogin(username=test_user.username, password=test_user.password)
+        response = await ac.post("/api/auth/token", json=body.model_dump())
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert 0 < int(response.headers["Retry-After"]) <= settings.LOGIN_LIMIT_WINDOW_SECONDS
+
+    async def test_success_not_counted(self, ac: AsyncClient, settings: Settings, test_user):
+        body = UserLogin(username=test_user.username, password=test_user.password)
+        for _ in range(settings.LOGIN_LIMIT_PER_USERNAME + 1):
+            response = await ac.post("/api/auth/token", json=body.model_dump())
+            assert response.status_code == status.HTTP_200_OK
+
+    async def test_ip_limit(self, ac: AsyncClient, settings: Settings, monkeypatch):
+        monkeypatch.setattr(settings, "LOGIN_LIMIT_PER_IP", 20)
+        for i in range(settings.LOGIN_LIMIT_PER_IP):
+            body = UserLogin(username=f"unknown_user_{i}", password="password")
+            response = await ac.post("/api/auth/token", json=body.model_dump())
+            assert response.status_code == status.HTTP_401_UNAUTHORIZED
+
+        body = UserLogin(username="one_more_user", password="password")
+        response = await ac.post("/api/auth/token", json=body.model_dump())
+        assert response.status_code == status.HTTP_429_TOO_MANY_REQUESTS
+        assert "Retry-After" in response.headers
+
+
 class TestLogout:
     async def test_success(self, ac: AsyncClient, bearer, admin_bearer):
         response = await ac.post("/api/auth/logout", headers=bearer)
@@ -96,3 +180,74 @@ class TestLogoutAll:
         third_response = await ac.post("/api/auth/logout", headers=admin_bearer)
         assert third_response.status_code == status.HTTP_401_UNAUTHORIZED
         assert third_response.json()["detail"] == "Authorization required"
+
+
+class TestRevocationIndex:
+    async def test_sync(self, redis_bl, revocation_index, settings):
+        token_bl = TokenBlacklistService(
+            redis_bl=redis_bl, settings=settings, revocation_index=revocation_index
+        )
+
+        # written by another worker whose message this process did not receive
+        await redis_bl.hset("revoked_jtis:1", "other_jti", "1")
+        await redis_bl.set("revoked:legacy_jti", "1")
+        # the user's logout timestamp is known, so the index answers without redis
+        revocation_index.add_logout("1", 0)
+        assert not revocation_index.might_be_revoked("other_jti", "1", 100)
+        assert not revocation_index.might_be_revoked("legacy_jti", "1", 100)
+        assert not await token_bl.is_revoked("other_jti", "1", 100)
+        assert not await token_bl.is_revoked("legacy_jti", "1", 100)
+
+        await revocation_index.sync(redis_bl)
+        assert await token_bl.is_revoked("other_jti", "1", 100)
+        assert await token_bl.is_revoked("legacy_jti", "1", 100)
+
+    async def test_logout_ts(self, redis_bl, revocation_index, settings):
+        token_bl = TokenBlacklistService(
+            redis_bl=redis_bl, settings=settings, revocation_index=revocation_index
+        )
+
+        # unknown users are looked up in redis, the answer is kept for the next check
+        await redis_bl.set("logout_ts:2", "100")
+        assert await token_bl.is_revoked("jti", "2", 100)
+        assert not await token_bl.is_revoked("jti", "2", 101)
+        assert not revocation_index.might_be_revoked("jti", "2", 101)
+
+        # a write whose message was lost stays unseen until the entry is reloaded
+        await redis_bl.set("logout_ts:2", "200")
+        assert not await token_bl.is_revoked("jti", "2", 101)
+
+        await revocation_index.sync(redis_bl)
+        assert await token_bl.is_revoked("jti", "2", 101)
+
+        await token_bl.set_logout_timestamp(2)
+        assert revocation_index.might_be_revoked("jti", "2", 101)
+
+    async def test_own_writes(self, redis_bl, revocation_index, settings):
+        token_bl = TokenBlacklistService(
+            redis_bl=redis_bl, settings=settings, revocation_index=revocation_index
+        )
+
+        await token_bl.blacklist_tokens("revoked_jti", 1)
+        assert await token_bl.is_revoked("revoked_jti", "1", 100)
+
+        await redis_bl.hdel("revoked_jtis:1", "revoked_jti")
+        # a local hit is confirmed in redis before the token is rejected
+        assert not await token_bl.is_revoked("revoked_jti", "1", 100)
+
+    async def test_remaining_lifetime(self, redis_bl, settings):
+        token_bl = TokenBlacklistService(redis_bl=redis_bl, settings=settings)
+        refresh_seconds = settings.REFRESH_TOKEN_EXPIRE_DAYS * 86400
+        now_ts = int(datetime.datetime.now(datetime.UTC).timestamp())
+
+        # a pair issued an hour ago is only kept for what is left of its refresh token
+        await token_bl.blacklist_tokens("old_jti", 1, now_ts - 3600)
+        await token_bl.blacklist_tokens("new_jti", 1, now_ts)
+        old_ttl, new_ttl = await redis_bl.httl("revoked_jtis:1", "old_jti", "new_jti")
+        assert refresh_seconds - 3600 - 2 <= old_ttl <= refresh_seconds - 3600
+        assert refresh_seconds - 2 <= new_ttl <= refresh_seconds
+
+        # an expired pair is not stored at all
+        await token_bl.blacklist_tokens("expired_jti", 1, now_ts - refresh_seconds - 1)
+        assert not await token_bl.is_blacklisted("expired_jti", "1")
+        assert await redis_bl.hlen("revoked_jtis:1") == 2
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import pytest
+
+from src.core.cache import LocalCache, SingleFlight
+
+
+class TestLocalCache:
+    def test_get_set(self) -> None:
+        cache = LocalCache(maxsize=10, ttl=60)
+        cache.set("categories:pages:1", "page")
+
+        assert cache.get("categories:pages:1") == "page"
+        assert cache.get("categories:pages:2") is None
+
+    def test_expired(self) -> None:
+        cache = LocalCache(maxsize=10, ttl=0.01)
+        cache.set("key", "value")
+        time.sleep(0.02)
+
+        assert cache.get("key") is None
+        assert len(cache) == 0
+
+    def test_size_bound_evicts_least_recently_used(self) -> None:
+        cache = LocalCache(maxsize=2, ttl=60)
+        cache.set("first", 1)
+        cache.set("second", 2)
+        cache.get("first")
+        cache.set("third", 3)
+
+        assert len(cache) == 2
+        assert cache.get("second") is None
+        assert cache.get("first") == 1
+        assert cache.get("third") == 3
+
+    def test_invalidate_prefix(self) -> None:
+        cache = LocalCache(maxsize=10, ttl=60)
+        cache.set("categories:pages:1", 1)
+        cache.set("categories:pages:2", 2)
+        cache.set("tasks:1", 3)
+
+        cache.invalidate("categories:pages")
+        assert cache.get("categories:pages:1") is None
+        assert cache.get("categories:pages:2") is None
+        assert cache.get("tasks:1") == 3
+
+        cache.invalidate()
+        assert len(cache) == 0
+
+    def test_set_skipped_after_invalidation(self) -> None:
+        cache = LocalCache(maxsize=10, ttl=60)
+        generation = cache.generation
+
+        cache.invalidate("categories:pages")
+        cache.set("categories:pages:1", "page read before the invalidation", generation=generation)
+        assert cache.get("categories:pages:1") is None
+
+        cache.set("categories:pages:1", "page", generation=cache.generation)
+        assert cache.get("categories:pages:1") == "page"
+
+
+class TestSingleFlight:
+    async def test_spawn(self) -> None:
+        single_flight = SingleFlight()
+        calls = 0
+
+        async def refresh() -> None:
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+
+        single_flight.spawn("key", refresh)
+        single_flight.spawn("key", refresh)
+        await asyncio.sleep(0.05)
+        assert calls == 1
+
+        # once the call is done, the key can be refreshed again
+        single_flight.spawn("key", refresh)
+        await asyncio.sleep(0.05)
+        assert calls == 2
+
+    async def test_spawn_failure_logged(self, caplog) -> None:
+        single_flight = SingleFlight()
+
+        async def fail() -> None:
+            raise ValueError("refresh failed")
+
+        single_flight.spawn("key", fail)
+        await asyncio.sleep(0.01)
+        assert "refresh failed" in caplog.text
@@ -0,0 +1,75 @@
+import pytest
+
+from src.core.exceptions import InvalidCursor
+from src.core.pagination import (
+    Page,
+    PageParams,
+    RenderedPage,
+    decode_cursor,
+    encode_cursor,
+    etag_matches,
+    page_etag,
+)
+from src.tasks.schemas import CategoryDb
+
+
+class TestCursor:
+    def test_round_trip(self) -> None:
+        cursor = encode_cursor(42)
+        assert "42" not in cursor
+        assert decode_cursor(cursor) == 42
+
+    @pytest.mark.parametrize("cursor", ["not-a-cursor", encode_cursor(1)[:-2], "e30", "WyJpZCJd"])
+    def test_invalid(self, cursor: str) -> None:
+        with pytest.raises(InvalidCursor):
+            decode_cursor(cursor)
+
+
+class TestPage:
+    categories = [CategoryDb(id=i, name=f"category {i}") for i in range(1, 4)]
+
+    def test_has_next(self) -> None:
+        page = Page[CategoryDb].from_items(self.categories, limit=2)
+        assert [category.id for category in page.items] == [1, 2]
+        assert decode_cursor(page.next_cursor) == 2
+
+    def test_last(self) -> None:
+        page = Page[CategoryDb].from_items(self.categories, limit=3)
+        assert len(page.items) == 3
+        assert page.next_cursor is None
+
+
+class TestRenderedPage:
+    def test_from_page(self) -> None:
+        categories = [CategoryDb(id=1, name="first"), CategoryDb(id=2, name="второй")]
+        page = RenderedPage.from_page(Page[CategoryDb](items=categories, next_cursor="cursor"))
+
+        assert page.content == '[{"name":"first","id":1},{"name":"второй","id":2}]'
+
+        response = page.to_response()
+        assert response.body == page.content.encode()
+        assert response.headers["X-Next-Cursor"] == "cursor"
+        assert response.media_type == "application/json"
+
+
+class TestEtag:
+    def test_page_etag(self) -> None:
+        etag = page_etag("version", PageParams(limit=10))
+
+        assert etag == page_etag("version", PageParams(limit=10))
+        assert etag != page_etag("version", PageParams(limit=10, after=5))
+        assert etag != page_etag("new version", PageParams(limit=10))
+
+    @pytest.mark.parametrize(
+        "if_none_match, matches",
+        [
+            (None, False),
+            ('"other"', False),
+            ('"etag"', True),
+            ('W/"etag"', True),
+            ('"other", "etag"', True),
+            ("*", True),
+        ],
+    )
+    def test_etag_matches(self, if_none_match: str | None, matches: bool) -> None:
+        assert etag_matches(if_none_match, '"etag"') is matches
@@ -0,0 +1,18 @@
+from src.core.query_stats import QueryStats
+
+
+class TestQueryStats:
+    def test_record(self) -> None:
+        stats = QueryStats()
+        assert stats.most_repeated() is None
+
+        stats.record("SELECT tasks.id FROM tasks", 0.002)
+        for _ in range(3):
+            stats.record("SELECT categories.id FROM categories WHERE categories.id = $1", 0.001)
+
+        assert stats.count == 4
+        assert round(stats.seconds, 6) == 0.005
+        assert stats.most_repeated() == (
+            "SELECT categories.id FROM categories WHERE categories.id = $1",
+            3,
+        )
@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from passlib.context import CryptContext
+
+from src.users.auth.exceptions import HashingOverloaded
+from src.users.auth.hashing import PasswordHasher
+
+
+class TestPasswordHasher:
+    pwd_context = CryptContext(
+        schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=12, bcrypt__min_rounds=12
+    )
+
+    async def test_hash_verify(self) -> None:
+        hasher = PasswordHasher(self.pwd_context, workers=2, queue_size=2)
+        try:
+            hashed_password = await hasher.hash("password")
+            assert await hasher.verify("password", hashed_password)
+            assert not await hasher.verify("wrong_password", hashed_password)
+
+            metrics = hasher.metrics()
+            assert metrics["completed"] == 3
+            assert metrics["running"] == metrics["queued"] == 0
+            assert metrics["max_latency_ms"] >= metrics["avg_latency_ms"] > 0
+        finally:
+            hasher.shutdown()
+
+    async def test_verify_and_update(self) -> None:
+        old_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4)
+        hasher = PasswordHasher(self.pwd_context, workers=1, queue_size=0)
+        try:
+            old_hashed_password = old_context.hash("password")
+            verified, new_hashed_password = await hasher.verify_and_update(
+                "password", old_hashed_password
+            )
+            assert verified
+            assert new_hashed_password is not None
+            assert not self.pwd_context.needs_update(new_hashed_password)
+
+            assert await hasher.verify_and_update("password", new_hashed_password) == (True, None)
+            assert await hasher.verify_and_update("wrong", old_hashed_password) == (False, None)
+        finally:
+            hasher.shutdown()
+
+    async def test_overloaded(self) -> None:
+        hasher = PasswordHasher(self.pwd_context, workers=1, queue_size=1)
+        try:
+            results = await asyncio.gather(
+                *(hasher.hash("password") for _ in range(3)), return_exceptions=True
+            )
+            assert sum(isinstance(result, HashingOverloaded) for result in results) == 1
+            assert hasher.metrics()["rejected"] == 1
+        finally:
+            hasher.shutdown()
+
+    async def test_cancelled_keeps_slot(self) -> None:
+        hasher = PasswordHasher(self.pwd_context, workers=1, queue_size=0)
+        try:
+            task = asyncio.create_task(hasher.hash("password"))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+            # the thread is still hashing, so the slot stays taken until it is done
+            assert hasher.metrics()["running"] == 1
+            with pytest.raises(HashingOverloaded):
+                await hasher.hash("password")
+
+            while hasher.metrics()["running"]:
+                await asyncio.sleep(0.01)
+            assert await hasher.hash("password")
+        finally:
+            hasher.shutdown()
+
+    async def test_does_not_block_loop(self) -> None:
+        hasher = PasswordHasher(self.pwd_context, workers=1, queue_size=0)
+        ticks = 0
+
+        async def tick() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.001)
+
+        ticker = asyncio.create_task(tick())
+        try:
+            await hasher.hash("password")
+            assert ticks > 1
+        finally:
+            ticker.cancel()
+            hasher.shutdown()
+            with pytest.raises(asyncio.CancelledError):
+                await ticker
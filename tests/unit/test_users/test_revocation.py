@@ -0,0 +1,58 @@
+import time
+
+from src.core.cache import LocalCache
+from src.users.auth.revocation import RevocationIndex
+
+
+def make_index(ttl: float = 60) -> RevocationIndex:
+    index = RevocationIndex(logout_ts=LocalCache(maxsize=2, ttl=ttl))
+    index.ready = True
+    return index
+
+
+class TestRevocationIndex:
+    def test_not_ready(self) -> None:
+        index = make_index()
+        index.ready = False
+        index.add_logout("1", 0)
+        assert index.might_be_revoked("jti", "1", 100)
+
+    def test_revoked(self) -> None:
+        index = make_index()
+        index.add_logout("1", 0)
+
+        index.apply("revoked:revoked_jti")
+        assert index.might_be_revoked("revoked_jti", "1", 100)
+        assert not index.might_be_revoked("other_jti", "1", 100)
+
+    def test_logout(self) -> None:
+        index = make_index()
+
+        index.apply("logout_ts:1:100")
+        assert index.might_be_revoked("jti", "1", 100)
+        assert not index.might_be_revoked("jti", "1", 101)
+        # users not cached yet have to be checked in redis
+        assert index.might_be_revoked("jti", "2", 100)
+
+        # a late message never moves the timestamp back
+        index.add_logout("1", 50)
+        assert index.might_be_revoked("jti", "1", 100)
+
+    def test_logout_bounded(self) -> None:
+        index = make_index()
+
+        for user_id in ("1", "2", "3"):
+            index.add_logout(user_id, 0)
+
+        assert len(index) == 2
+        assert index.might_be_revoked("jti", "1", 100)
+        assert not index.might_be_revoked("jti", "3", 100)
+
+    def test_logout_expires(self) -> None:
+        index = make_index(ttl=0.01)
+
+        index.add_logout("1", 0)
+        assert not index.might_be_revoked("jti", "1", 100)
+
+        time.sleep(0.02)
+        assert index.might_be_revoked("jti", "1", 100)
@@ -1,10 +1,13 @@
 import datetime
 
 import jwt
+import pytest
 
 from src.core.config import get_settings
+from src.users.auth.exceptions import InvalidTokenType
 from src.users.auth.schemas import (
     AccessTokenPayload,
+    CompactAccessTokenPayload,
     RefreshTokenPayload,
     Tokens,
     TokenType,
@@ -47,16 +50,16 @@ class TestSecurityService:
         type=TokenType.refresh,
     )
 
-    def test_hash_password(self, test_security_service: SecurityService) -> None:
-        hashed_password = test_security_service.hash_password(self.test_password)
+    async def test_hash_password(self, test_security_service: SecurityService) -> None:
+        hashed_password = await test_security_service.hash_password(self.test_password)
         assert isinstance(hashed_password, str)
         assert hashed_password != self.test_password
         assert self.settings.PWD_CONTEXT.verify(self.test_password, hashed_password)
 
-    def test_verify_password(self, test_security_service: SecurityService) -> None:
+    async def test_verify_password(self, test_security_service: SecurityService) -> None:
         hashed_password = self.settings.PWD_CONTEXT.hash(self.test_password)
-        assert test_security_service.verify_password(self.test_password, hashed_password)
-        assert not test_security_service.verify_password("wrong_password", hashed_password)
+        assert await test_security_service.verify_password(self.test_password, hashed_password)
+        assert not await test_security_service.verify_password("wrong_password", hashed_password)
 
     def test_get_token_expiration(self, test_security_service: SecurityService) -> None:
         access_token_expiration = (
@@ -112,6 +115,34 @@ class TestSecurityService:
 
         assert decoded_refresh_token["type"] == "refresh_token"
 
+    async def test_compact_access_token(
+        self, fake_blacklist_service, password_hasher, token_cache
+    ) -> None:
+        security_service = SecurityService(
+            token_bl=fake_blacklist_service,
+            settings=self.settings.model_copy(update={"COMPACT_ACCESS_TOKENS": True}),
+            hasher=password_hasher,
+            token_cache=token_cache,
+        )
+
+        access_token = security_service.create_token(
+            self.test_user_payload, TokenType.access, "test_jti"
+        )
+        claims = jwt.decode(access_token, self.settings.JWT_SECRET_KEY, algorithms=["HS256"])
+        assert set(claims) == {"sub", "jti", "iat", "exp", "typ", "usr", "adm"}
+
+        decoded_access_token = await security_service.decode_validate_token(
+            access_token, TokenType.access
+        )
+        assert isinstance(decoded_access_token, CompactAccessTokenPayload)
+        assert decoded_access_token.username == self.test_user_payload.username
+        assert decoded_access_token.is_admin == self.test_user_payload.is_admin
+        assert decoded_access_token.email is None
+
+        # a compact access token is still not a refresh token
+        with pytest.raises(InvalidTokenType):
+            await security_service.decode_validate_token(access_token, TokenType.refresh)
+
     def test_create_tokens(self, test_security_service) -> None:
         tokens = test_security_service.create_tokens(self.test_user_payload)
 
@@ -137,3 +168,24 @@ class TestSecurityService:
 
         assert self.test_access_token == decoded_access_token
         assert self.test_refresh_token == decoded_refresh_token
+
+    async def test_decode_validate_token_cached(
+        self, test_security_service: SecurityService, token_cache
+    ) -> None:
+        access_token = jwt.encode(
+            self.test_access_token.model_dump(), self.settings.JWT_SECRET_KEY, algorithm="HS256"
+        )
+
+        decoded_access_token = await test_security_service.decode_validate_token(
+            access_token, TokenType.access
+        )
+        assert len(token_cache) == 1
+
+        cached_access_token = await test_security_service.decode_validate_token(
+            access_token, TokenType.access
+        )
+        assert cached_access_token is decoded_access_token
+
+        # the cached payload is only valid for the type it was checked against
+        with pytest.raises(InvalidTokenType):
+            await test_security_service.decode_validate_token(access_token, TokenType.refresh)